@@ -0,0 +1,6 @@
+"""Benchmarks of the theatre API.
+
+``http_load`` drives HTTP workloads against a running server and
+``micro`` times serializers and querysets in process. Both write JSON
+reports that can be diffed between commits.
+"""
@@ -0,0 +1,491 @@
+"""HTTP load benchmark of the theatre API.
+
+Run it against a server whose database was filled by
+``manage.py generate_load_data``, for example::
+
+    python -m benchmarks.http_load --start-server --load-data \\
+        --workload all --duration 30 --concurrency 16 \\
+        --output benchmarks/results/http.json
+
+Every worker logs in as its own generated user through
+/api/user/token/, staff workloads as its own generated staff user.
+Database queries per request come from the X-DB-Queries header, so the
+server has to run with QUERY_INSTRUMENTATION=true, which --start-server
+does. The started server is gunicorn with gunicorn.conf.py and the
+production settings, --runserver starts the development server instead.
+A started server also runs without throttles unless --throttle is
+given, and the throttle counters are cleared before every workload, so
+the report measures the API rather than 429 responses.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import shlex
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+from benchmarks.report import environment, summarize, write_report
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+API = "/api/theatre"
+PRODUCTION_SETTINGS = "theatre_api_service.settings_production"
+SEARCH_WORDS = ("night", "king", "garden", "storm", "river", "crown")
+
+
+class Client:
+    """Keep-alive JSON client of one worker, logged in as one user"""
+
+    def __init__(self, base_url, email, password, timeout):
+        url = urlsplit(base_url)
+        self.host = url.hostname
+        self.port = url.port or 80
+        self.email = email
+        self.password = password
+        self.timeout = timeout
+        self.connection = None
+        self.token = None
+
+    def request(self, method, path, params=None, body=None):
+        if params:
+            path = f"{path}?{urlencode(params)}"
+        headers = {"Accept": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+
+        if self.connection is None:
+            self.connection = http.client.HTTPConnection(
+                self.host, self.port, timeout=self.timeout
+            )
+        try:
+            self.connection.request(method, path, payload, headers)
+            response = self.connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            self.connection = None
+            raise
+        return response.status, response.getheader("X-DB-Queries"), data
+
+    def login(self):
+        self.token = None
+        status, _, data = self.request(
+            "POST",
+            "/api/user/token/",
+            body={"email": self.email, "password": self.password},
+        )
+        if status != 200:
+            raise RuntimeError(f"Login of {self.email} failed with {status}")
+        self.token = json.loads(data)["access"]
+
+    def call(self, method, path, params=None, body=None):
+        status, queries, data = self.request(method, path, params, body)
+        if status == 401:
+            # access tokens are short lived, log in again once
+            self.login()
+            status, queries, data = self.request(method, path, params, body)
+        return status, queries, data
+
+    def results(self, path, **params):
+        status, _, data = self.call("GET", path, {"page_size": 100, **params})
+        if status != 200:
+            raise RuntimeError(f"GET {path} failed with {status}")
+        return json.loads(data)["results"]
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = []
+
+    def add(self, endpoint, status, latency_ms, queries):
+        with self.lock:
+            self.samples.append((endpoint, str(status), latency_ms, queries))
+
+    def report(self, elapsed):
+        count = len(self.samples)
+        status = Counter(sample[1] for sample in self.samples)
+        errors = {
+            code: number
+            for code, number in status.items()
+            if not code.startswith(("2", "3"))
+        }
+        endpoints = defaultdict(list)
+        for sample in self.samples:
+            endpoints[sample[0]].append(sample)
+
+        return {
+            "requests": count,
+            "elapsed_s": round(elapsed, 2),
+            "throughput_rps": round(count / elapsed, 1) if elapsed else 0,
+            "latency_ms": summarize([sample[2] for sample in self.samples]),
+            "status": dict(status),
+            "errors": errors,
+            "error_rate": (
+                round(sum(errors.values()) / count, 4) if count else 0
+            ),
+            "db_queries": self.queries_summary(self.samples),
+            "endpoints": {
+                endpoint: {
+                    "requests": len(samples),
+                    "latency_ms": summarize([sample[2] for sample in samples]),
+                    "db_queries": self.queries_summary(samples),
+                }
+                for endpoint, samples in sorted(endpoints.items())
+            },
+        }
+
+    @staticmethod
+    def queries_summary(samples):
+        return summarize(
+            [int(sample[3]) for sample in samples if sample[3] is not None]
+        )
+
+
+def discover(client, start):
+    """Ids the workloads pick from, read through the API itself"""
+    performances = client.results(
+        f"{API}/performances/",
+        available="true",
+        show_time_after=start.isoformat(),
+    )
+    if not performances:
+        raise RuntimeError("No performances found, run generate_load_data")
+    storm = performances[0]["id"]
+    _, _, data = client.call("GET", f"{API}/performances/{storm}/")
+    hall = json.loads(data)["theatre_hall"]
+    return {
+        "start": start,
+        "plays": [play["id"] for play in client.results(f"{API}/plays/")],
+        "genres": [genre["id"] for genre in client.results(f"{API}/genres/")],
+        "actors": [actor["id"] for actor in client.results(f"{API}/actors/")],
+        "performances": [performance["id"] for performance in performances],
+        "storm": storm,
+        "storm_hall": (hall["rows"], hall["seats_in_row"]),
+    }
+
+
+def catalog_request(catalog, rng):
+    choice = rng.random()
+    if choice < 0.3:
+        params = {"genres": rng.choice(catalog["genres"])}
+        if rng.random() < 0.5:
+            params["facets"] = "true"
+        return "plays-list", "GET", f"{API}/plays/", params, None
+    if choice < 0.5:
+        play = rng.choice(catalog["plays"])
+        return "plays-detail", "GET", f"{API}/plays/{play}/", None, None
+    if choice < 0.65:
+        params = {"search": rng.choice(SEARCH_WORDS)}
+        return "plays-search", "GET", f"{API}/plays/", params, None
+    if choice < 0.85:
+        return "actors-list", "GET", f"{API}/actors/", None, None
+    return "genres-list", "GET", f"{API}/genres/", None, None
+
+
+def performances_request(catalog, rng):
+    if rng.random() < 0.7:
+        day = catalog["start"] + timedelta(days=rng.randint(0, 30))
+        params = {
+            "show_time_after": day.isoformat(),
+            "show_time_before": (day + timedelta(days=7)).isoformat(),
+        }
+        if rng.random() < 0.3:
+            params["play"] = rng.choice(catalog["plays"])
+        path = f"{API}/performances/"
+        return "performances-list", "GET", path, params, None
+    performance = rng.choice(catalog["performances"])
+    path = f"{API}/performances/{performance}/"
+    return "performances-detail", "GET", path, None, None
+
+
+def seat_map_request(catalog, rng):
+    performance = rng.choice(catalog["performances"])
+    path = f"{API}/performances/{performance}/seats/"
+    return "performances-seats", "GET", path, None, None
+
+
+def mixed_request(catalog, rng):
+    request = rng.choices(
+        (catalog_request, performances_request, seat_map_request),
+        weights=(4, 3, 3),
+    )[0]
+    return request(catalog, rng)
+
+
+def reservation_request(catalog, rng):
+    rows, seats_in_row = catalog["storm_hall"]
+    party = rng.randint(1, 4)
+    row = rng.randint(1, rows)
+    first = rng.randint(1, max(1, seats_in_row - party + 1))
+    body = {
+        "tickets": [
+            {"row": row, "seat": seat, "performance": catalog["storm"]}
+            for seat in range(first, min(first + party, seats_in_row + 1))
+        ]
+    }
+    return "reservation-create", "POST", f"{API}/reservation/", None, body
+
+
+WORKLOADS = {
+    "catalog": catalog_request,
+    "performances": performances_request,
+    "seat-maps": seat_map_request,
+    "mixed": mixed_request,
+    # every worker books seats of the same performance at once
+    "reservation-storm": reservation_request,
+}
+# only staff may create reservations, so these run as --staff-email users
+STAFF_WORKLOADS = {"reservation-storm"}
+
+
+def run_workload(name, clients, catalog, args):
+    recorder = Recorder()
+    make_request = WORKLOADS[name]
+    deadline = time.monotonic() + args.duration
+
+    def work(index):
+        rng = random.Random(f"{args.seed}-{name}-{index}")
+        client = clients[index]
+        while time.monotonic() < deadline:
+            endpoint, method, path, params, body = make_request(catalog, rng)
+            start = time.perf_counter()
+            try:
+                status, queries, _ = client.call(method, path, params, body)
+            except (OSError, http.client.HTTPException) as error:
+                status, queries = type(error).__name__, None
+            latency_ms = (time.perf_counter() - start) * 1000
+            recorder.add(endpoint, status, latency_ms, queries)
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(len(clients)) as pool:
+        list(pool.map(work, range(len(clients))))
+    return recorder.report(time.monotonic() - started)
+
+
+def wait_for_port(host, port, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server did not listen on {host}:{port}")
+
+
+def start_server(args):
+    url = urlsplit(args.base_url)
+    bind = f"{url.hostname}:{url.port or 80}"
+    env = {**os.environ, "QUERY_INSTRUMENTATION": "true"}
+    if args.server_command:
+        command = args.server_command
+    elif args.runserver:
+        command = (
+            f"{shlex.quote(sys.executable)} manage.py runserver --noreload "
+            f"{bind}"
+        )
+    else:
+        command = (
+            f"{shlex.quote(sys.executable)} -m gunicorn "
+            f"-c gunicorn.conf.py --bind {bind}"
+        )
+        env["DJANGO_SETTINGS_MODULE"] = PRODUCTION_SETTINGS
+        env.setdefault("ALLOWED_HOSTS", url.hostname)
+    if not args.throttle:
+        env.update(THROTTLE_RATE_ANON="", THROTTLE_RATE_USER="")
+    process = subprocess.Popen(
+        shlex.split(command),
+        cwd=BASE_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_port(url.hostname, url.port or 80, args.server_timeout)
+    except RuntimeError:
+        process.terminate()
+        raise
+    return process
+
+
+def server_name(args):
+    if not args.start_server:
+        return None
+    if args.server_command:
+        return args.server_command
+    return "runserver" if args.runserver else "gunicorn"
+
+
+def clear_throttle_counters():
+    subprocess.run(
+        [sys.executable, "manage.py", "clear_throttle_counters", "--all"],
+        cwd=BASE_DIR,
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+def load_data(args):
+    subprocess.run(
+        [
+            sys.executable,
+            "manage.py",
+            "generate_load_data",
+            "--flush",
+            "--seed",
+            str(args.seed),
+            "--users",
+            str(max(args.concurrency, 100)),
+            "--staff-users",
+            str(args.concurrency),
+            "--start",
+            args.start.isoformat(),
+            *shlex.split(args.load_data_args),
+        ],
+        cwd=BASE_DIR,
+        check=True,
+    )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument(
+        "--workload",
+        choices=(*WORKLOADS, "all"),
+        action="append",
+        dest="workloads",
+        help="Workload to run, may be repeated (default: all)",
+    )
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument(
+        "--start",
+        type=date.fromisoformat,
+        default=date(2030, 1, 1),
+        help="First day of the generated performances",
+    )
+    parser.add_argument(
+        "--user-email",
+        default="load-user{}@example.com",
+        help="Email of worker n, formatted with n starting at 1",
+    )
+    parser.add_argument(
+        "--staff-email",
+        default="load-staff{}@example.com",
+        help="Email of worker n of workloads that need a staff user",
+    )
+    parser.add_argument("--password", default="loadtest123")
+    parser.add_argument(
+        "--start-server",
+        action="store_true",
+        help="Start the API with query instrumentation for the run",
+    )
+    parser.add_argument(
+        "--server-command",
+        help="Command starting the server (default: gunicorn)",
+    )
+    parser.add_argument(
+        "--runserver",
+        action="store_true",
+        help="Start manage.py runserver with the development settings "
+        "instead of gunicorn with the production settings",
+    )
+    parser.add_argument("--server-timeout", type=float, default=30)
+    parser.add_argument(
+        "--throttle",
+        action="store_true",
+        help="Keep the configured throttle rates in the started server",
+    )
+    parser.add_argument(
+        "--load-data",
+        action="store_true",
+        help="Run generate_load_data --flush before the benchmark",
+    )
+    parser.add_argument(
+        "--load-data-args",
+        default="",
+        help="Extra options for generate_load_data",
+    )
+    parser.add_argument("--output", help="JSON report path (default: stdout)")
+    args = parser.parse_args(argv)
+
+    if not args.workloads or "all" in args.workloads:
+        args.workloads = list(WORKLOADS)
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.load_data:
+        load_data(args)
+
+    server = start_server(args) if args.start_server else None
+    try:
+        emails = {
+            staff: [
+                email.format(index + 1) for index in range(args.concurrency)
+            ]
+            for staff, email in (
+                (False, args.user_email),
+                (True, args.staff_email),
+            )
+        }
+        clients = {
+            staff: [
+                Client(args.base_url, email, args.password, args.timeout)
+                for email in emails[staff]
+            ]
+            for staff in (False, True)
+        }
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            for staff_clients in clients.values():
+                list(pool.map(Client.login, staff_clients))
+        catalog = discover(clients[False][0], args.start)
+
+        report = {
+            "environment": environment(),
+            "config": {
+                "base_url": args.base_url,
+                "duration_s": args.duration,
+                "concurrency": args.concurrency,
+                "seed": args.seed,
+                "server": server_name(args),
+                "throttle": args.throttle or not args.start_server,
+                "load_data_args": args.load_data_args,
+            },
+            "workloads": {},
+        }
+        for name in args.workloads:
+            if server is not None:
+                clear_throttle_counters()
+            print(f"Running {name} for {args.duration:g}s", file=sys.stderr)
+            report["workloads"][name] = run_workload(
+                name, clients[name in STAFF_WORKLOADS], catalog, args
+            )
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
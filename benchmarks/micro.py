@@ -0,0 +1,456 @@
+"""Timing benchmarks of the hot Python paths of the theatre API.
+
+Serializers, validators and view querysets are run in process against
+a throwaway test database filled by ``generate_load_data``::
+
+    python -m benchmarks.micro --save-baseline
+    # change a serializer, then
+    python -m benchmarks.micro
+
+Every benchmark reports its time, the memory it allocates (tracemalloc)
+and its query count. Results are compared with the baseline, and the
+run fails when a benchmark got slower or allocates more than the
+thresholds allow, or runs more queries. Baselines only compare on the
+machine that recorded them.
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import django
+
+from benchmarks.report import environment, write_report
+
+BENCHMARKS = {}
+SIZE = 1000
+DEFAULT_BASELINE = (
+    Path(__file__).resolve().parent / "results" / "micro-baseline.json"
+)
+
+
+def benchmark(name):
+    """Register a setup function returning the callable to measure"""
+
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+def view_queryset(viewset, action, user, **params):
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    request = Request(APIRequestFactory().get("/", params))
+    request.user = user
+    view = viewset(action=action, request=request, kwargs={})
+    return view.get_queryset()
+
+
+def staff_user():
+    from django.contrib.auth import get_user_model
+
+    return get_user_model().objects.filter(is_staff=True).first()
+
+
+@benchmark("play_list_serializer")
+def play_list_serializer():
+    from theatre.serializers import PlayListSerializer
+    from theatre.views import PlaysViewSet
+
+    plays = list(view_queryset(PlaysViewSet, "list", staff_user())[:SIZE])
+    return lambda: PlayListSerializer(plays, many=True).data
+
+
+@benchmark("performance_detail_serializer")
+def performance_detail_serializer():
+    from theatre.serializers import PerformanceDetailSerializer
+    from theatre.views import PerformanceViewSet
+
+    queryset = view_queryset(PerformanceViewSet, "retrieve", staff_user())
+    performances = list(
+        queryset.prefetch_related("play__genres", "play__actors")[:SIZE]
+    )
+    return lambda: PerformanceDetailSerializer(performances, many=True).data
+
+
+def busiest_reservations():
+    from django.contrib.auth import get_user_model
+    from django.db.models import Count
+
+    from theatre.views import ReservationViewSet
+
+    # with five generated users each has over a thousand reservations
+    user = (
+        get_user_model()
+        .objects.annotate(count=Count("reservation"))
+        .order_by("-count")
+        .first()
+    )
+    queryset = view_queryset(ReservationViewSet, "list", user)
+    return queryset.order_by("-created_at", "-id")
+
+
+@benchmark("reservation_list_serializer")
+def reservation_list_serializer():
+    from theatre.serializers import ReservationListSerializer
+
+    reservations = list(busiest_reservations()[:SIZE])
+    return lambda: ReservationListSerializer(reservations, many=True).data
+
+
+@benchmark("validate_ticket")
+def validate_ticket():
+    from theatre.models import TheatreHall, Ticket
+
+    hall = TheatreHall.objects.first()
+    seats = [
+        (row, seat)
+        for row in range(1, hall.rows + 1)
+        for seat in range(1, hall.seats_in_row + 1)
+    ][:SIZE]
+
+    def run():
+        for row, seat in seats:
+            Ticket.validate_ticket(row, seat, hall)
+
+    return run
+
+
+@benchmark("performance_list_queryset")
+def performance_list_queryset():
+    from theatre.views import PerformanceViewSet
+
+    user = staff_user()
+    return lambda: list(
+        view_queryset(PerformanceViewSet, "list", user).order_by(
+            *PerformanceViewSet.ordering
+        )[:SIZE]
+    )
+
+
+@benchmark("play_list_queryset")
+def play_list_queryset():
+    from theatre.views import PlaysViewSet
+
+    user = staff_user()
+    return lambda: list(
+        view_queryset(PlaysViewSet, "list", user).order_by("id")[:SIZE]
+    )
+
+
+def list_page(viewset, serializer_class, fast):
+    """Fetch and render a page of a list route, the way list() does"""
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    request = Request(APIRequestFactory().get("/"))
+    request.user = staff_user()
+    view = viewset(action="list", request=request, kwargs={})
+    ordering = getattr(viewset, "ordering", ("id",))
+
+    def run():
+        queryset = view.get_queryset().order_by(*ordering)
+        if fast:
+            rows = view.fast_list_rows(queryset)
+            return view.fast_list_data(list(rows[:SIZE]))
+        return serializer_class(list(queryset[:SIZE]), many=True).data
+
+    return run
+
+
+@benchmark("play_list_page")
+def play_list_page():
+    from theatre.serializers import PlayListSerializer
+    from theatre.views import PlaysViewSet
+
+    return list_page(PlaysViewSet, PlayListSerializer, fast=False)
+
+
+@benchmark("play_list_page_fast")
+def play_list_page_fast():
+    from theatre.views import PlaysViewSet
+
+    return list_page(PlaysViewSet, None, fast=True)
+
+
+@benchmark("performance_list_page")
+def performance_list_page():
+    from theatre.serializers import PerformanceListSerializer
+    from theatre.views import PerformanceViewSet
+
+    return list_page(PerformanceViewSet, PerformanceListSerializer, fast=False)
+
+
+@benchmark("performance_list_page_fast")
+def performance_list_page_fast():
+    from theatre.views import PerformanceViewSet
+
+    return list_page(PerformanceViewSet, None, fast=True)
+
+
+def render_page(serializer_class, queryset, renderer_class):
+    data = serializer_class(list(queryset[:SIZE]), many=True).data
+    renderer = renderer_class()
+    return lambda: renderer.render({"results": data})
+
+
+@benchmark("performance_list_render")
+def performance_list_render():
+    from rest_framework.renderers import JSONRenderer
+
+    from theatre.serializers import PerformanceListSerializer
+    from theatre.views import PerformanceViewSet
+
+    queryset = view_queryset(PerformanceViewSet, "list", staff_user())
+    return render_page(PerformanceListSerializer, queryset, JSONRenderer)
+
+
+@benchmark("performance_list_render_fast")
+def performance_list_render_fast():
+    from theatre.serializers import PerformanceListSerializer
+    from theatre.views import PerformanceViewSet
+    from theatre_api_service.renderers import FastJSONRenderer
+
+    queryset = view_queryset(PerformanceViewSet, "list", staff_user())
+    return render_page(PerformanceListSerializer, queryset, FastJSONRenderer)
+
+
+@benchmark("reservation_list_render")
+def reservation_list_render():
+    from rest_framework.renderers import JSONRenderer
+
+    from theatre.serializers import ReservationListSerializer
+
+    return render_page(
+        ReservationListSerializer, busiest_reservations(), JSONRenderer
+    )
+
+
+@benchmark("reservation_list_render_fast")
+def reservation_list_render_fast():
+    from theatre.serializers import ReservationListSerializer
+    from theatre_api_service.renderers import FastJSONRenderer
+
+    return render_page(
+        ReservationListSerializer, busiest_reservations(), FastJSONRenderer
+    )
+
+
+def throttle_requests(throttle_class, **attrs):
+    """SIZE requests of one user through a throttle that never blocks"""
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    request = Request(APIRequestFactory().get("/"))
+    request.user = staff_user()
+    # own keys, apart from the counters of real requests
+    attrs.update(rate="1000000/hour", scope="benchmark")
+    throttle_class = type("Throttle", (throttle_class,), attrs)
+
+    def run():
+        for _ in range(SIZE):
+            throttle_class().allow_request(request, None)
+
+    return run
+
+
+@benchmark("user_throttle_history")
+def user_throttle_history():
+    from rest_framework.throttling import UserRateThrottle
+
+    return throttle_requests(UserRateThrottle)
+
+
+@benchmark("user_throttle_sliding_window")
+def user_throttle_sliding_window():
+    from theatre_api_service.throttling import UserRateThrottle
+
+    return throttle_requests(UserRateThrottle)
+
+
+@benchmark("user_throttle_sliding_window_10k_keys")
+def user_throttle_sliding_window_10k_keys():
+    import time
+
+    from theatre.models import ThrottleCounter
+    from theatre_api_service.throttling import UserRateThrottle
+
+    # live counters of other clients in the same hourly window
+    period = int(time.time() // 3600)
+    ThrottleCounter.objects.bulk_create(
+        ThrottleCounter(
+            key=f"throttle_client_{i}",
+            period=period,
+            count=1,
+            expires=(period + 2) * 3600,
+        )
+        for i in range(10 * SIZE)
+    )
+    return throttle_requests(UserRateThrottle)
+
+
+def measure(run, repeat):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    run()  # warm up caches and lazy imports
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    try:
+        run()
+        allocated, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # the log keeps 9000 queries, a full one would capture none
+    connection.queries_log.clear()
+    with CaptureQueriesContext(connection) as context:
+        run()
+
+    return {
+        "time_ms": {
+            "median": round(statistics.median(timings), 3),
+            "min": round(min(timings), 3),
+            "max": round(max(timings), 3),
+        },
+        "allocated_kib": round(allocated / 1024, 1),
+        "peak_kib": round(peak / 1024, 1),
+        "queries": len(context),
+    }
+
+
+def compare(results, baseline, time_threshold, memory_threshold):
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        median = result["time_ms"]["median"]
+        base_median = base["time_ms"]["median"]
+        if median > base_median * (1 + time_threshold):
+            regressions.append(
+                f"{name}: median {median} ms, baseline {base_median} ms"
+            )
+        if result["peak_kib"] > base["peak_kib"] * (1 + memory_threshold):
+            regressions.append(
+                f"{name}: peak {result['peak_kib']} KiB, "
+                f"baseline {base['peak_kib']} KiB"
+            )
+        if result["queries"] > base["queries"]:
+            regressions.append(
+                f"{name}: {result['queries']} queries, "
+                f"baseline {base['queries']}"
+            )
+    return regressions
+
+
+def load_data(seed):
+    from django.core.management import call_command
+
+    call_command(
+        "generate_load_data",
+        halls=5,
+        actors=300,
+        plays=SIZE,
+        days=20,
+        performances_per_day=SIZE // 20,
+        users=5,
+        fill_rate=0.05,
+        seed=seed,
+        stdout=io.StringIO(),
+    )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "--benchmark",
+        choices=BENCHMARKS,
+        action="append",
+        dest="benchmarks",
+        help="Benchmark to run, may be repeated (default: all)",
+    )
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Store the results as the new baseline",
+    )
+    parser.add_argument(
+        "--time-threshold",
+        type=float,
+        default=0.2,
+        help="Allowed slowdown of the median time (0.2 is 20%%)",
+    )
+    parser.add_argument(
+        "--memory-threshold",
+        type=float,
+        default=0.2,
+        help="Allowed growth of the peak allocation (0.2 is 20%%)",
+    )
+    parser.add_argument("--output", help="JSON report path (default: stdout)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ.setdefault(
+        "DJANGO_SETTINGS_MODULE", "theatre_api_service.settings"
+    )
+    django.setup()
+    from django.db import connection
+
+    names = args.benchmarks or list(BENCHMARKS)
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        load_data(args.seed)
+        results = {}
+        for name in names:
+            print(f"Running {name}", file=sys.stderr)
+            results[name] = measure(BENCHMARKS[name](), args.repeat)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    report = {
+        "environment": environment(),
+        "config": {"size": SIZE, "repeat": args.repeat, "seed": args.seed},
+        "benchmarks": results,
+    }
+    write_report(report, args.output)
+
+    if args.save_baseline:
+        write_report(report, args.baseline)
+        return
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}", file=sys.stderr)
+        return
+    baseline = json.loads(args.baseline.read_text())["benchmarks"]
+    regressions = compare(
+        results, baseline, args.time_threshold, args.memory_threshold
+    )
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Per-request overhead of a settings module.
+
+Serves the same requests in process through Django's test client, once
+for every settings module and each in its own interpreter, so the
+difference is what the apps and middleware of a profile cost::
+
+    python -m benchmarks.settings_overhead \\
+        --settings theatre_api_service.settings \\
+        --settings theatre_api_service.settings_production
+
+Throttling is switched off, one user sends all the requests. Requests
+come from ``--remote-addr``; from an ``INTERNAL_IPS`` address such as
+127.0.0.1 the development settings also run the debug toolbar. Every
+module gets the same ``--cache-backend``, a file based cache by default
+as the production settings refuse process-local ones.
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import django
+
+from benchmarks.report import environment, summarize, write_report
+
+PATHS = (
+    "/api/theatre/plays/",
+    "/api/theatre/performances/",
+    "/api/theatre/genres/",
+)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "--settings",
+        action="append",
+        help="Settings module to compare, may be repeated "
+        "(default: the development and the production settings)",
+    )
+    parser.add_argument(
+        "--requests",
+        type=int,
+        default=2000,
+        help="Requests per path",
+    )
+    parser.add_argument("--remote-addr", default="203.0.113.10")
+    parser.add_argument(
+        "--cache-backend",
+        default="django.core.cache.backends.filebased.FileBasedCache",
+    )
+    parser.add_argument(
+        "--cache-location",
+        help="Cache location (default: a new temporary directory)",
+    )
+    parser.add_argument("--output", help="JSON report path (default: stdout)")
+    parser.add_argument(
+        "--worker", action="store_true", help=argparse.SUPPRESS
+    )
+    return parser.parse_args(argv)
+
+
+def serve(settings_module, count, remote_addr):
+    """Time ``count`` requests of every path under one settings module"""
+    os.environ["DJANGO_SETTINGS_MODULE"] = settings_module
+    from django.conf import settings
+
+    settings.REST_FRAMEWORK = {
+        **settings.REST_FRAMEWORK,
+        "DEFAULT_THROTTLE_CLASSES": [],
+    }
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, "testserver"]
+    django.setup()
+
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test import Client
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        call_command(
+            "generate_load_data",
+            halls=3,
+            actors=50,
+            plays=50,
+            days=5,
+            performances_per_day=4,
+            users=1,
+            fill_rate=0.1,
+            stdout=io.StringIO(),
+        )
+        user = get_user_model().objects.get(email="load-admin@example.com")
+        client = Client(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}",
+            REMOTE_ADDR=remote_addr,
+        )
+
+        timings = {}
+        for path in PATHS:
+            assert client.get(path).status_code == 200, path
+            times = []
+            for _ in range(count):
+                start = time.perf_counter()
+                client.get(path)
+                times.append((time.perf_counter() - start) * 1000)
+            timings[path] = summarize(times, digits=3)
+
+        return {
+            "debug": settings.DEBUG,
+            "apps": len(settings.INSTALLED_APPS),
+            "middleware": len(settings.MIDDLEWARE),
+            "time_ms": timings,
+            "query_log": len(connection.queries_log),
+            "max_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        }
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def run(settings_module, count, remote_addr, cache_backend, cache_location):
+    """Serve under ``settings_module`` in a new interpreter"""
+    print(f"Running {settings_module}", file=sys.stderr)
+    env = {
+        **os.environ,
+        "CACHE_BACKEND": cache_backend,
+        "CACHE_LOCATION": cache_location or tempfile.mkdtemp(),
+    }
+    command = [
+        sys.executable,
+        "-m",
+        "benchmarks.settings_overhead",
+        "--worker",
+        "--settings",
+        settings_module,
+        "--requests",
+        str(count),
+        "--remote-addr",
+        remote_addr,
+    ]
+    output = subprocess.run(
+        command, stdout=subprocess.PIPE, check=True, text=True, env=env
+    ).stdout
+    return json.loads(output)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    modules = args.settings or [
+        "theatre_api_service.settings",
+        "theatre_api_service.settings_production",
+    ]
+    if args.worker:
+        result = serve(modules[0], args.requests, args.remote_addr)
+        print(json.dumps(result))
+        return
+
+    results = {
+        module: run(
+            module,
+            args.requests,
+            args.remote_addr,
+            args.cache_backend,
+            args.cache_location,
+        )
+        for module in modules
+    }
+    baseline = results[modules[0]]["time_ms"]
+    for result in results.values():
+        result["saved_ms"] = {
+            path: round(baseline[path]["mean"] - time_ms["mean"], 3)
+            for path, time_ms in result["time_ms"].items()
+        }
+
+    report = {
+        "environment": environment(),
+        "config": {
+            "requests": args.requests,
+            "remote_addr": args.remote_addr,
+            "cache_backend": args.cache_backend,
+            "paths": PATHS,
+        },
+        "settings": results,
+    }
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+"""Gunicorn settings of the production server.
+
+Worker processes scale with the CPUs; each runs ``GUNICORN_THREADS``
+threads, so keep ``DB_POOL_MAX_SIZE`` at least as large.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+wsgi_app = "theatre_api_service.wsgi:application"
+
+workers = int(
+    os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1)
+)
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+
+# recycle workers now and then, staggered so they do not restart together
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 10000))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG")
+errorlog = "-"
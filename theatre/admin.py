@@ -8,6 +8,9 @@ from theatre.models import (
     TheatreHall,
     Ticket,
     Reservation,
+    SeatHold,
+    HeldSeat,
+    IdempotencyKey,
 )
 
 # Register your models here.
@@ -18,3 +21,6 @@ admin.site.register(Actor)
 admin.site.register(TheatreHall)
 admin.site.register(Reservation)
 admin.site.register(Ticket)
+admin.site.register(SeatHold)
+admin.site.register(HeldSeat)
+admin.site.register(IdempotencyKey)
@@ -0,0 +1,57 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from theatre.versions import collection_versions
+
+
+class ConditionalGetMixin:
+    """Answer conditional list and retrieve requests with 304.
+
+    The validators come from the versions of the collections in
+    ``conditional_collections``, which ``theatre.signals`` bump on every
+    save, delete and relation change. A 304 is sent after one cache
+    lookup, without any query. Listing the collections of the related
+    models catches changes to nested data.
+    """
+
+    conditional_collections = ()
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        versions = collection_versions(self.conditional_collections)
+        # versions are nanosecond times of the last change
+        last_modified = max(versions) // 10**9 if versions else None
+
+        serializer_class = self.get_serializer_class()
+        raw = "|".join(
+            (
+                request.get_full_path(),
+                request.accepted_renderer.format,
+                f"{serializer_class.__module__}.{serializer_class.__name__}",
+                repr(versions),
+            )
+        )
+        etag = f'"{hashlib.md5(raw.encode()).hexdigest()}"'
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is not None:
+            return response
+
+        response = handler(request, *args, **kwargs)
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
@@ -0,0 +1,38 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class SeatsConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Some of the requested seats have just been taken."
+    default_code = "seats_taken"
+
+    def __init__(self, seats):
+        super().__init__()
+        self.detail = {
+            "detail": self.detail,
+            "seats": [
+                {"performance": performance_id, "row": row, "seat": seat}
+                for performance_id, row, seat in sorted(seats)
+            ],
+        }
+
+
+class HoldExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = "The seat hold has expired."
+    default_code = "hold_expired"
+
+
+class NoAdjacentSeats(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "No block of adjacent seats of this size is available."
+    default_code = "no_adjacent_seats"
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = (
+        "This Idempotency-Key was already used with a different request."
+    )
+    default_code = "idempotency_key_reused"
@@ -0,0 +1,144 @@
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, Exists, F, OuterRef, Value
+from django.db.models.functions import Concat
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from theatre.models import Play
+
+
+def ids_param(request, name):
+    """Comma separated ids of a query parameter (ex. ?genres=1,2)"""
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        return [int(str_id) for str_id in value.split(",")]
+    except ValueError:
+        raise ValidationError({name: "Expected comma separated ids."})
+
+
+def bool_param(request, name):
+    return request.query_params.get(name) in ("1", "true", "True")
+
+
+def datetime_param(request, name, end_of_day=False):
+    """Datetime or date of a query parameter.
+
+    A bare date stands for the start of that day, or for the start of
+    the next one with ``end_of_day`` so it can be used as an exclusive
+    upper bound.
+    """
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        day = parse_date(value)
+        if day is not None:
+            if end_of_day:
+                day += timedelta(days=1)
+            moment = datetime.combine(day, time.min)
+        else:
+            moment = parse_datetime(value)
+        if moment is None:
+            raise ValueError(value)
+    except ValueError:
+        raise ValidationError({name: "Expected a date or a datetime."})
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def play_has(relation, ids, play_ref="pk"):
+    """EXISTS semi-join on a many-to-many of Play, rows stay unique"""
+    field = Play._meta.get_field(relation)
+    return Exists(
+        field.remote_field.through.objects.filter(
+            **{
+                field.m2m_field_name(): OuterRef(play_ref),
+                f"{field.m2m_reverse_field_name()}__in": ids,
+            }
+        )
+    )
+
+
+def filter_performances(queryset, request):
+    show_time_after = datetime_param(request, "show_time_after")
+    show_time_before = datetime_param(
+        request, "show_time_before", end_of_day=True
+    )
+    plays = ids_param(request, "play")
+    theatre_halls = ids_param(request, "theatre_hall")
+    actors = ids_param(request, "actors")
+    genres = ids_param(request, "genres")
+
+    if show_time_after:
+        queryset = queryset.filter(show_time__gte=show_time_after)
+    if show_time_before:
+        queryset = queryset.filter(show_time__lt=show_time_before)
+    if plays:
+        queryset = queryset.filter(play_id__in=plays)
+    if theatre_halls:
+        queryset = queryset.filter(theatre_hall_id__in=theatre_halls)
+    if actors:
+        queryset = queryset.filter(play_has("actors", actors, "play_id"))
+    if genres:
+        queryset = queryset.filter(play_has("genres", genres, "play_id"))
+    if bool_param(request, "available"):
+        queryset = queryset.filter(
+            capacity__gt=F("tickets_sold") + F("seats_held")
+        )
+    return queryset
+
+
+def filter_plays(queryset, request):
+    genres = ids_param(request, "genres")
+    actors = ids_param(request, "actors")
+    title = request.query_params.get("title")
+
+    if genres:
+        queryset = queryset.filter(play_has("genres", genres))
+    if actors:
+        queryset = queryset.filter(play_has("actors", actors))
+    if title:
+        queryset = queryset.filter(title__icontains=title)
+    return queryset
+
+
+def play_facets(queryset):
+    """Number of matching plays per genre and per actor.
+
+    Both group-bys run as one UNION ALL query over the relation tables.
+    """
+    play_ids = queryset.order_by().values("pk")
+    genres = (
+        Play.genres.through.objects.filter(play_id__in=play_ids)
+        .values("genre_id")
+        .annotate(
+            facet=Value("genres"),
+            name=F("genre__name"),
+            count=Count("play_id"),
+        )
+        .values_list("facet", "genre_id", "name", "count")
+    )
+    actors = (
+        Play.actors.through.objects.filter(play_id__in=play_ids)
+        .values("actor_id")
+        .annotate(
+            facet=Value("actors"),
+            name=Concat(
+                "actor__first_name", Value(" "), "actor__last_name"
+            ),
+            count=Count("play_id"),
+        )
+        .values_list("facet", "actor_id", "name", "count")
+    )
+
+    facets = {"genres": [], "actors": []}
+    for facet, facet_id, name, count in genres.union(actors, all=True):
+        facets[facet].append({"id": facet_id, "name": name, "count": count})
+    for values in facets.values():
+        values.sort(key=lambda value: (-value["count"], value["name"]))
+    return facets
@@ -0,0 +1,86 @@
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from theatre.models import Performance
+from theatre_api_service.local_cache import LocalCache
+
+# stands in for the hall in Ticket.validate_ticket
+HallGeometry = namedtuple("HallGeometry", ("hall_id", "rows", "seats_in_row"))
+
+local_geometries = LocalCache(
+    "HALL_GEOMETRY_LOCAL_CACHE_SIZE", "HALL_GEOMETRY_LOCAL_CACHE_TIMEOUT"
+)
+
+
+def hall_geometry_key(performance_id):
+    return f"theatre:hall-geometry:{performance_id}"
+
+
+def get_hall_geometries(performance_ids):
+    """Hall geometry of every existing performance, by performance id.
+
+    Looked up in the per-process LRU, then in the shared cache, and the
+    remaining performances are loaded with one query.
+    """
+    geometries = {}
+    keys = {}
+    for performance_id in performance_ids:
+        geometry = local_geometries.get(performance_id)
+        if geometry is None:
+            keys[hall_geometry_key(performance_id)] = performance_id
+        else:
+            geometries[performance_id] = geometry
+    if not keys:
+        return geometries
+
+    found = {
+        keys[key]: HallGeometry(*geometry)
+        for key, geometry in cache.get_many(keys).items()
+    }
+    missing = set(keys.values()) - set(found)
+    if missing:
+        loaded = {
+            performance_id: HallGeometry(*geometry)
+            for performance_id, *geometry in Performance.objects.filter(
+                id__in=missing
+            ).values_list(
+                "id",
+                "theatre_hall_id",
+                "theatre_hall__rows",
+                "theatre_hall__seats_in_row",
+            )
+        }
+        cache.set_many(
+            {
+                hall_geometry_key(performance_id): tuple(geometry)
+                for performance_id, geometry in loaded.items()
+            },
+            settings.HALL_GEOMETRY_CACHE_TIMEOUT,
+        )
+        found.update(loaded)
+
+    for performance_id, geometry in found.items():
+        local_geometries.set(performance_id, geometry)
+    geometries.update(found)
+    return geometries
+
+
+def get_hall_geometry(performance_id):
+    """Hall geometry of a performance, None when it does not exist"""
+    return get_hall_geometries([performance_id]).get(performance_id)
+
+
+def forget_hall_geometries(performance_ids):
+    for performance_id in performance_ids:
+        local_geometries.delete(performance_id)
+    cache.delete_many([hall_geometry_key(pk) for pk in performance_ids])
+
+
+def invalidate_hall_geometries(performance_ids):
+    performance_ids = list(performance_ids)
+    forget_hall_geometries(performance_ids)
+    # again after commit, a request may have cached the old hall meanwhile
+    transaction.on_commit(lambda: forget_hall_geometries(performance_ids))
@@ -0,0 +1,118 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from theatre.exceptions import HoldExpired, SeatsConflict
+from theatre.models import (
+    HeldSeat,
+    Performance,
+    Reservation,
+    SeatHold,
+    Ticket,
+)
+from theatre.seat_map import invalidate_seat_maps
+
+
+def hold_expiry(hold=None):
+    """Expiry of a new hold, or of ``hold`` extended by one more period"""
+    expires_at = timezone.now() + timedelta(
+        minutes=settings.SEAT_HOLD_MINUTES
+    )
+    if hold is not None:
+        expires_at = min(
+            expires_at,
+            hold.created_at
+            + timedelta(minutes=settings.SEAT_HOLD_MAX_MINUTES),
+        )
+    return expires_at
+
+
+@transaction.atomic
+def release_holds(holds):
+    """Delete the holds of the queryset and give their seats back.
+
+    Performances are locked before the holds are touched, the same order
+    the other hold operations use.
+    """
+    Performance.lock(set(holds.values_list("performance_id", flat=True)))
+    held = (
+        HeldSeat.objects.filter(hold__in=holds)
+        .order_by()
+        .values("performance")
+        .annotate(count=Count("id"))
+    )
+    released = {row["performance"]: -row["count"] for row in held}
+    holds.delete()
+    Performance.change_seats_held(released)
+    invalidate_seat_maps(released)
+    return -sum(released.values())
+
+
+@transaction.atomic
+def hold_seats(user, performance, seats_data):
+    seats = [
+        (performance.id, seat_data["row"], seat_data["seat"])
+        for seat_data in seats_data
+    ]
+    Performance.lock([performance.id])
+    release_holds(
+        SeatHold.objects.filter(
+            performance=performance, expires_at__lte=timezone.now()
+        )
+    )
+    lost = Ticket.taken_seats(seats) | HeldSeat.held_seats(seats)
+    if lost:
+        raise SeatsConflict(lost)
+
+    hold = SeatHold.objects.create(
+        performance=performance, user=user, expires_at=hold_expiry()
+    )
+    HeldSeat.objects.bulk_create(
+        HeldSeat(hold=hold, performance=performance, **seat_data)
+        for seat_data in seats_data
+    )
+    Performance.change_seats_held({performance.id: len(seats)})
+    invalidate_seat_maps([performance.id])
+    return hold
+
+
+def _lock_live_hold(hold):
+    Performance.lock([hold.performance_id])
+    hold = SeatHold.objects.select_for_update().get(id=hold.id)
+    if hold.is_expired:
+        raise HoldExpired()
+    return hold
+
+
+@transaction.atomic
+def extend_hold(hold):
+    hold = _lock_live_hold(hold)
+    hold.expires_at = hold_expiry(hold)
+    hold.save(update_fields=["expires_at"])
+    return hold
+
+
+@transaction.atomic
+def confirm_hold(hold):
+    """Turn a live hold into a reservation with one ticket per seat"""
+    hold = _lock_live_hold(hold)
+    seats = list(hold.seats.values_list("row", "seat"))
+
+    reservation = Reservation.objects.create(user=hold.user)
+    Ticket.objects.bulk_create(
+        Ticket(
+            reservation=reservation,
+            performance_id=hold.performance_id,
+            row=row,
+            seat=seat,
+        )
+        for row, seat in seats
+    )
+    hold.delete()
+    Performance.change_seats_held({hold.performance_id: -len(seats)})
+    Performance.change_tickets_sold({hold.performance_id: len(seats)})
+    invalidate_seat_maps([hold.performance_id])
+    return reservation
@@ -0,0 +1,66 @@
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from theatre.exceptions import IdempotencyKeyReused
+from theatre.models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+
+def request_hash(request):
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def idempotent_response(request, run):
+    """Run ``run`` at most once per user and Idempotency-Key.
+
+    The key row is inserted and locked in the same transaction that runs
+    the request, so a concurrent duplicate blocks on it and then replays
+    the stored response. Failed requests roll the key back and may be
+    retried with it.
+    """
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if not key:
+        return run()
+    if len(key) > IdempotencyKey._meta.get_field("key").max_length:
+        raise ValidationError({IDEMPOTENCY_HEADER: "Key is too long."})
+
+    fingerprint = request_hash(request)
+    expires_at = timezone.now() + timedelta(
+        hours=settings.IDEMPOTENCY_KEY_TTL_HOURS
+    )
+    with transaction.atomic():
+        record, created = (
+            IdempotencyKey.objects.select_for_update().get_or_create(
+                user=request.user,
+                key=key,
+                defaults={
+                    "request_hash": fingerprint,
+                    "expires_at": expires_at,
+                },
+            )
+        )
+        if not created and record.expires_at > timezone.now():
+            if record.request_hash != fingerprint:
+                raise IdempotencyKeyReused()
+            return Response(
+                record.response_body,
+                status=record.response_status,
+                headers={"Idempotent-Replayed": "true"},
+            )
+
+        response = run()
+        record.request_hash = fingerprint
+        record.expires_at = expires_at
+        record.response_status = response.status_code
+        record.response_body = response.data
+        record.save()
+    return response
@@ -0,0 +1,33 @@
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from theatre.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Delete expired idempotency keys"  # noqa: VNE003
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of keys deleted per query",
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        deleted = 0
+        while True:
+            batch = list(
+                IdempotencyKey.objects.filter(expires_at__lte=now)
+                .values_list("id", flat=True)[: options["batch_size"]]
+            )
+            if not batch:
+                break
+            IdempotencyKey.objects.filter(id__in=batch).delete()
+            deleted += len(batch)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {deleted} expired idempotency key(s)")
+        )
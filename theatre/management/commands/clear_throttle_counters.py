@@ -0,0 +1,40 @@
+import time
+
+from django.core.management import BaseCommand
+
+from theatre.models import ThrottleCounter
+
+
+class Command(BaseCommand):
+    help = "Delete expired throttle counters"  # noqa: VNE003
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of counters deleted per query",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Delete the live counters too, resetting every limit",
+        )
+
+    def handle(self, *args, **options):
+        counters = ThrottleCounter.objects.all()
+        if not options["all"]:
+            counters = counters.filter(expires__lte=int(time.time()))
+        deleted = 0
+        while True:
+            batch = list(
+                counters.values_list("id", flat=True)[: options["batch_size"]]
+            )
+            if not batch:
+                break
+            ThrottleCounter.objects.filter(id__in=batch).delete()
+            deleted += len(batch)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {deleted} throttle counter(s)")
+        )
@@ -0,0 +1,467 @@
+import csv
+import io
+import random
+import time
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from theatre.models import (
+    Actor,
+    Genre,
+    Play,
+    Performance,
+    Reservation,
+    SeatHold,
+    HeldSeat,
+    TheatreHall,
+    Ticket,
+)
+
+GENRES = (
+    "Drama", "Comedy", "Tragedy", "Musical", "Opera", "Ballet", "Farce",
+    "Satire", "Melodrama", "Mystery", "Thriller", "Romance", "Fantasy",
+    "Historical", "Absurdist", "Documentary", "Puppetry", "Cabaret",
+    "Improvisation", "Experimental",
+)
+FIRST_NAMES = (
+    "Anna", "Bohdan", "Clara", "Dmytro", "Elena", "Filip", "Greta",
+    "Hugo", "Iryna", "Jonas", "Kateryna", "Lukas", "Maria", "Nazar",
+    "Olga", "Pavlo", "Quentin", "Roksolana", "Stepan", "Taras", "Uliana",
+    "Viktor", "Wanda", "Yurii", "Zoriana",
+)
+LAST_NAMES = (
+    "Bondar", "Coleman", "Dovzhenko", "Evans", "Franko", "Garcia",
+    "Hrytsenko", "Ivanenko", "Jensen", "Kovalenko", "Lysenko", "Moroz",
+    "Novak", "Olsen", "Petrenko", "Quinn", "Rudenko", "Savchenko",
+    "Tkachenko", "Usyk", "Vasylenko", "Walker", "Yatsenko", "Zhuk",
+)
+TITLE_WORDS = (
+    "Night", "Garden", "Winter", "Forest", "Song", "King", "Widow",
+    "Letter", "Bridge", "Storm", "Mirror", "Orchard", "Harbour", "Fire",
+    "Lantern", "River", "Dream", "Crown", "Stranger", "Feast",
+)
+SHOW_HOURS = (11, 14, 16, 19, 21)
+USER_PASSWORD = "loadtest123"
+ADMIN_EMAIL = "load-admin@example.com"
+
+
+class TableWriter:
+    """Buffer rows of one table and write them in large batches.
+
+    PostgreSQL gets the rows through COPY, other databases through
+    bulk_create. Rows carry their primary keys, so both paths write the
+    same data and sequences are reset once loading is done.
+    """
+
+    def __init__(self, model, fields, batch_size, use_copy):
+        self.model = model
+        self.fields = fields
+        self.batch_size = batch_size
+        self.use_copy = use_copy
+        self.rows = []
+        self.written = 0
+
+    def add(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        if self.use_copy:
+            self.copy()
+        else:
+            objects = [
+                self.model(**dict(zip(self.fields, row))) for row in self.rows
+            ]
+            self.model.objects.bulk_create(
+                objects, batch_size=self.batch_size
+            )
+        self.written += len(self.rows)
+        self.rows = []
+
+    def copy(self):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(self.rows)
+        buffer.seek(0)
+        columns = ", ".join(
+            connection.ops.quote_name(self.model._meta.get_field(name).column)
+            for name in self.fields
+        )
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {connection.ops.quote_name(self.model._meta.db_table)} "
+                f"({columns}) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+
+
+class Command(BaseCommand):
+    help = (  # noqa: VNE003
+        "Generate a deterministic, production-sized catalog with "
+        "performances, users, reservations and tickets for load testing"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--halls", type=int, default=20)
+        parser.add_argument("--genres", type=int, default=len(GENRES))
+        parser.add_argument("--actors", type=int, default=2000)
+        parser.add_argument("--plays", type=int, default=1000)
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument(
+            "--performances-per-day",
+            type=int,
+            default=60,
+            help="Performances starting each day, spread over the halls",
+        )
+        parser.add_argument("--users", type=int, default=10000)
+        parser.add_argument(
+            "--staff-users",
+            type=int,
+            default=0,
+            help="Staff users load-staff<n>@example.com next to the admin",
+        )
+        parser.add_argument(
+            "--fill-rate",
+            type=float,
+            default=0.6,
+            help="Average share of sold seats per performance",
+        )
+        parser.add_argument(
+            "--start",
+            type=lambda value: datetime.strptime(value, "%Y-%m-%d").date(),
+            default="2030-01-01",
+            help="Date of the first performance (YYYY-MM-DD)",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=50000)
+        parser.add_argument(
+            "--flush",
+            action="store_true",
+            help="Delete the theatre data and load users first",
+        )
+
+    def handle(self, *args, **options):
+        if not 0 <= options["fill_rate"] <= 1:
+            raise CommandError("--fill-rate must be between 0 and 1")
+        if options["genres"] > len(GENRES):
+            raise CommandError(f"--genres can be at most {len(GENRES)}")
+
+        self.rng = random.Random(options["seed"])
+        self.now = timezone.now()
+        self.batch_size = options["batch_size"]
+        self.use_copy = connection.vendor == "postgresql"
+        started = time.monotonic()
+
+        with transaction.atomic():
+            if options["flush"]:
+                self.flush()
+            elif self.has_data():
+                raise CommandError(
+                    "The database already has theatre data or load users, "
+                    "use --flush to replace them"
+                )
+            users = self.generate_users(
+                options["users"], options["staff_users"]
+            )
+            genres = self.generate_genres(options["genres"])
+            actors = self.generate_actors(options["actors"])
+            plays = self.generate_plays(options["plays"], genres, actors)
+            halls = self.generate_halls(options["halls"])
+            performances, tickets = self.generate_performances(
+                options, plays, halls, users
+            )
+            self.reset_sequences()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {len(users)} users, {len(plays)} plays, "
+                f"{performances} performances and {tickets} tickets "
+                f"in {time.monotonic() - started:.1f}s"
+            )
+        )
+
+    def writer(self, model, fields):
+        return TableWriter(model, fields, self.batch_size, self.use_copy)
+
+    @staticmethod
+    def next_id(model):
+        return (model.objects.aggregate(last=Max("id"))["last"] or 0) + 1
+
+    @staticmethod
+    def has_data():
+        users = get_user_model().objects.filter(email__startswith="load-")
+        return users.exists() or any(
+            model.objects.exists()
+            for model in (Genre, Actor, Play, TheatreHall, Performance)
+        )
+
+    def flush(self):
+        models = (
+            Ticket,
+            Reservation,
+            HeldSeat,
+            SeatHold,
+            Performance,
+            Play.actors.through,
+            Play.genres.through,
+            Play,
+            Actor,
+            Genre,
+            TheatreHall,
+        )
+        tables = [
+            connection.ops.quote_name(model._meta.db_table) for model in models
+        ]
+        # plain SQL, the ORM would load millions of tickets to delete them
+        with connection.cursor() as cursor:
+            if self.use_copy:
+                cursor.execute(f"TRUNCATE {', '.join(tables)} CASCADE")
+            else:
+                for table in tables:
+                    cursor.execute(f"DELETE FROM {table}")
+        users = get_user_model().objects.filter(email__startswith="load-")
+        users.delete()
+
+    def generate_users(self, count, staff_count):
+        user_model = get_user_model()
+        first_id = self.next_id(user_model)
+        # hashing once keeps ten thousand users cheap; all share it
+        password = make_password(USER_PASSWORD)
+        writer = self.writer(
+            user_model,
+            (
+                "id",
+                "email",
+                "password",
+                "is_staff",
+                "is_superuser",
+                "is_active",
+                "first_name",
+                "last_name",
+                "date_joined",
+            ),
+        )
+        writer.add(
+            (
+                first_id,
+                ADMIN_EMAIL,
+                password,
+                True,
+                True,
+                True,
+                "",
+                "",
+                self.now,
+            )
+        )
+        for index in range(1, count + 1):
+            writer.add(
+                (
+                    first_id + index,
+                    f"load-user{index}@example.com",
+                    password,
+                    False,
+                    False,
+                    True,
+                    self.rng.choice(FIRST_NAMES),
+                    self.rng.choice(LAST_NAMES),
+                    self.now,
+                )
+            )
+        for index in range(1, staff_count + 1):
+            writer.add(
+                (
+                    first_id + count + index,
+                    f"load-staff{index}@example.com",
+                    password,
+                    True,
+                    False,
+                    True,
+                    "",
+                    "",
+                    self.now,
+                )
+            )
+        writer.flush()
+        return range(first_id + 1, first_id + count + 1)
+
+    def generate_genres(self, count):
+        first_id = self.next_id(Genre)
+        writer = self.writer(Genre, ("id", "name"))
+        for index, name in enumerate(GENRES[:count]):
+            writer.add((first_id + index, name))
+        writer.flush()
+        return range(first_id, first_id + count)
+
+    def generate_actors(self, count):
+        first_id = self.next_id(Actor)
+        writer = self.writer(Actor, ("id", "first_name", "last_name"))
+        names = len(FIRST_NAMES) * len(LAST_NAMES)
+        for index in range(count):
+            # walk every first/last name pair before numbering them
+            first_name = FIRST_NAMES[index % len(FIRST_NAMES)]
+            last_name = LAST_NAMES[index // len(FIRST_NAMES) % len(LAST_NAMES)]
+            if index >= names:
+                last_name = f"{last_name} {index // names + 1}"
+            writer.add((first_id + index, first_name, last_name))
+        writer.flush()
+        return range(first_id, first_id + count)
+
+    def generate_plays(self, count, genres, actors):
+        first_id = self.next_id(Play)
+        plays = self.writer(Play, ("id", "title", "description"))
+        play_genres = self.writer(Play.genres.through, ("play_id", "genre_id"))
+        play_actors = self.writer(Play.actors.through, ("play_id", "actor_id"))
+
+        for index in range(count):
+            play_id = first_id + index
+            first, second = self.rng.sample(TITLE_WORDS, 2)
+            plays.add(
+                (
+                    play_id,
+                    f"The {first} of the {second}",
+                    f"A story of the {first.lower()} and "
+                    f"the {second.lower()}.",
+                )
+            )
+            for genre_id in self.rng.sample(
+                genres, min(len(genres), self.rng.randint(1, 3))
+            ):
+                play_genres.add((play_id, genre_id))
+            for actor_id in self.rng.sample(
+                actors, min(len(actors), self.rng.randint(2, 8))
+            ):
+                play_actors.add((play_id, actor_id))
+
+        for writer in (plays, play_genres, play_actors):
+            writer.flush()
+        return range(first_id, first_id + count)
+
+    def generate_halls(self, count):
+        first_id = self.next_id(TheatreHall)
+        writer = self.writer(
+            TheatreHall, ("id", "name", "rows", "seats_in_row")
+        )
+        halls = []
+        for index in range(count):
+            hall = (
+                first_id + index,
+                f"Hall {index + 1}",
+                self.rng.randint(8, 30),
+                self.rng.randint(10, 40),
+            )
+            writer.add(hall)
+            halls.append(hall)
+        writer.flush()
+        return halls
+
+    def generate_performances(self, options, plays, halls, users):
+        performance_id = self.next_id(Performance)
+        reservation_id = self.next_id(Reservation)
+        ticket_id = self.next_id(Ticket)
+        performances = self.writer(
+            Performance,
+            (
+                "id",
+                "play_id",
+                "theatre_hall_id",
+                "show_time",
+                "capacity",
+                "tickets_sold",
+                "seats_held",
+            ),
+        )
+        reservations = self.writer(
+            Reservation, ("id", "created_at", "user_id")
+        )
+        tickets = self.writer(
+            Ticket, ("id", "row", "seat", "performance_id", "reservation_id")
+        )
+        start = timezone.make_aware(
+            datetime.combine(options["start"], datetime.min.time())
+        )
+
+        for day in range(options["days"]):
+            for slot in range(options["performances_per_day"]):
+                hall_id, _, rows, seats_in_row = halls[slot % len(halls)]
+                capacity = rows * seats_in_row
+                show_time = start + timedelta(
+                    days=day,
+                    hours=SHOW_HOURS[slot // len(halls) % len(SHOW_HOURS)],
+                )
+                fill = self.rng.gauss(options["fill_rate"], 0.1)
+                sold = sorted(
+                    self.rng.sample(
+                        range(capacity),
+                        round(capacity * min(1.0, max(0.0, fill))),
+                    )
+                )
+
+                performances.add(
+                    (
+                        performance_id,
+                        self.rng.choice(plays),
+                        hall_id,
+                        show_time,
+                        capacity,
+                        len(sold),
+                        0,
+                    )
+                )
+                # neighbouring sold seats are booked together, like parties
+                position = 0
+                while position < len(sold):
+                    party = sold[position:position + self.rng.randint(1, 6)]
+                    position += len(party)
+                    reservations.add(
+                        (
+                            reservation_id,
+                            show_time
+                            - timedelta(minutes=self.rng.randint(60, 86400)),
+                            self.rng.choice(users),
+                        )
+                    )
+                    for index in party:
+                        tickets.add(
+                            (
+                                ticket_id,
+                                index // seats_in_row + 1,
+                                index % seats_in_row + 1,
+                                performance_id,
+                                reservation_id,
+                            )
+                        )
+                        ticket_id += 1
+                    reservation_id += 1
+                performance_id += 1
+
+        for writer in (performances, reservations, tickets):
+            writer.flush()
+        return performances.written, tickets.written
+
+    def reset_sequences(self):
+        models = (
+            get_user_model(),
+            Genre,
+            Actor,
+            Play,
+            Play.genres.through,
+            Play.actors.through,
+            TheatreHall,
+            Performance,
+            Reservation,
+            Ticket,
+        )
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
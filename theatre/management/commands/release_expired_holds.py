@@ -0,0 +1,39 @@
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from theatre.holds import release_holds
+from theatre.models import SeatHold
+
+
+class Command(BaseCommand):
+    help = "Release seat holds that have expired"  # noqa: VNE003
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of holds released per transaction",
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        holds = seats = 0
+        while True:
+            batch = list(
+                SeatHold.objects.filter(expires_at__lte=now)
+                .order_by("expires_at")
+                .values_list("id", flat=True)[: options["batch_size"]]
+            )
+            if not batch:
+                break
+            seats += release_holds(
+                SeatHold.objects.filter(id__in=batch, expires_at__lte=now)
+            )
+            holds += len(batch)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Released {holds} expired hold(s) with {seats} seat(s)"
+            )
+        )
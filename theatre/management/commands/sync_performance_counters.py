@@ -0,0 +1,75 @@
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from theatre.models import HeldSeat, Performance, TheatreHall, Ticket
+
+
+class Command(BaseCommand):
+    help = (  # noqa: VNE003
+        "Check and rebuild the capacity, tickets_sold and seats_held "
+        "counters stored on Performance"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report drifted counters and fail if there are any",
+        )
+
+    @staticmethod
+    def count_per_performance(model):
+        count = (
+            model.objects.filter(performance=OuterRef("pk"))
+            .order_by()
+            .values("performance")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        return Coalesce(Subquery(count), 0)
+
+    def handle(self, *args, **options):
+        drifted = list(
+            Performance.objects.annotate(
+                actual_sold=self.count_per_performance(Ticket),
+                actual_held=self.count_per_performance(HeldSeat),
+                actual_capacity=F("theatre_hall__rows")
+                * F("theatre_hall__seats_in_row"),
+            )
+            .filter(
+                ~Q(tickets_sold=F("actual_sold"))
+                | ~Q(seats_held=F("actual_held"))
+                | ~Q(capacity=F("actual_capacity"))
+            )
+            .values_list("id", flat=True)
+        )
+
+        if not drifted:
+            self.stdout.write(
+                self.style.SUCCESS("Performance counters are consistent")
+            )
+            return
+
+        if options["check"]:
+            raise CommandError(
+                f"{len(drifted)} performance(s) have drifted counters: "
+                f"{', '.join(str(pk) for pk in drifted)}"
+            )
+
+        capacity = TheatreHall.objects.filter(
+            pk=OuterRef("theatre_hall_id")
+        ).values(total=F("rows") * F("seats_in_row"))
+        with transaction.atomic():
+            Performance.objects.filter(id__in=drifted).update(
+                capacity=Subquery(capacity),
+                tickets_sold=self.count_per_performance(Ticket),
+                seats_held=self.count_per_performance(HeldSeat),
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt counters of {len(drifted)} performance(s)"
+            )
+        )
@@ -0,0 +1,46 @@
+# Generated by Django 4.0.4 on 2026-10-18 03:11
+
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_performance_counters(apps, schema_editor):
+    Performance = apps.get_model("theatre", "Performance")
+    TheatreHall = apps.get_model("theatre", "TheatreHall")
+    Ticket = apps.get_model("theatre", "Ticket")
+
+    capacity = TheatreHall.objects.filter(pk=OuterRef("theatre_hall_id")).values(
+        total=F("rows") * F("seats_in_row")
+    )
+    sold = (
+        Ticket.objects.filter(performance=OuterRef("pk"))
+        .order_by()
+        .values("performance")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    Performance.objects.update(
+        capacity=Subquery(capacity),
+        tickets_sold=Coalesce(Subquery(sold), 0),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("theatre", "0003_alter_performance_theatre_hall"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="performance",
+            name="capacity",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="performance",
+            name="tickets_sold",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_performance_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.0.4 on 2026-10-18 03:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("theatre", "0008_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="performance",
+            index=models.Index(
+                fields=["play", "show_time"], name="theatre_per_play_id_1e3e93_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 4.0.4 on 2026-10-18 03:28
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+INDEXES = {
+    "actor": [
+        django.contrib.postgres.indexes.GinIndex(
+            fields=["first_name"],
+            name="theatre_actor_first_trgm",
+            opclasses=["gin_trgm_ops"],
+        ),
+        django.contrib.postgres.indexes.GinIndex(
+            fields=["last_name"],
+            name="theatre_actor_last_trgm",
+            opclasses=["gin_trgm_ops"],
+        ),
+    ],
+    "play": [
+        django.contrib.postgres.indexes.GinIndex(
+            fields=["search_vector"], name="theatre_play_search_gin"
+        ),
+    ],
+}
+
+SEARCH_VECTOR = """
+    setweight(to_tsvector('english', coalesce({row}title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce({row}description, '')), 'B')
+"""
+
+CREATE_TRIGGER = f"""
+CREATE FUNCTION theatre_play_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := {SEARCH_VECTOR.format(row="NEW.")};
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER theatre_play_search_vector
+    BEFORE INSERT OR UPDATE OF title, description ON theatre_play
+    FOR EACH ROW EXECUTE PROCEDURE theatre_play_search_vector();
+
+UPDATE theatre_play SET search_vector = {SEARCH_VECTOR.format(row="")};
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER theatre_play_search_vector ON theatre_play;
+DROP FUNCTION theatre_play_search_vector();
+"""
+
+
+def create_search_objects(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for model_name, indexes in INDEXES.items():
+        model = apps.get_model("theatre", model_name)
+        for index in indexes:
+            schema_editor.add_index(model, index)
+    schema_editor.execute(CREATE_TRIGGER)
+
+
+def drop_search_objects(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(DROP_TRIGGER)
+    for model_name, indexes in INDEXES.items():
+        model = apps.get_model("theatre", model_name)
+        for index in indexes:
+            schema_editor.remove_index(model, index)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("theatre", "0009_performance_play_show_time_index"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name="play",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        # the GIN indexes and the trigger only exist on PostgreSQL
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(create_search_objects, drop_search_objects),
+            ],
+            state_operations=[
+                migrations.AddIndex(model_name=model_name, index=index)
+                for model_name, indexes in INDEXES.items()
+                for index in indexes
+            ],
+        ),
+    ]
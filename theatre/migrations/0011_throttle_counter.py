@@ -0,0 +1,40 @@
+# Generated by Django 4.0.4 on 2026-10-18 04:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("theatre", "0010_search"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ThrottleCounter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=255)),
+                ("period", models.BigIntegerField()),
+                ("count", models.PositiveIntegerField(default=0)),
+                ("expires", models.BigIntegerField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="throttlecounter",
+            index=models.Index(
+                fields=["expires"], name="theatre_thr_expires_0b99b7_idx"
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="throttlecounter",
+            unique_together={("key", "period")},
+        ),
+    ]
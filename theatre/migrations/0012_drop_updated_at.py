@@ -0,0 +1,32 @@
+# Generated by Django 4.0.4 on 2026-10-18 04:48
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("theatre", "0011_throttle_counter"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="actor",
+            name="updated_at",
+        ),
+        migrations.RemoveField(
+            model_name="genre",
+            name="updated_at",
+        ),
+        migrations.RemoveField(
+            model_name="performance",
+            name="updated_at",
+        ),
+        migrations.RemoveField(
+            model_name="play",
+            name="updated_at",
+        ),
+        migrations.RemoveField(
+            model_name="theatrehall",
+            name="updated_at",
+        ),
+    ]
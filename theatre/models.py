@@ -1,7 +1,12 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models import F, ExpressionWrapper, IntegerField
 from django.utils import timezone
 from rest_framework.exceptions import ValidationError
 
+from theatre.versions import invalidate_collection
 from theatre_api_service import settings
 
 
@@ -17,6 +22,18 @@ class Actor(models.Model):
 
     class Meta:
         unique_together = ["first_name", "last_name"]
+        indexes = [
+            GinIndex(
+                fields=["first_name"],
+                opclasses=["gin_trgm_ops"],
+                name="theatre_actor_first_trgm",
+            ),
+            GinIndex(
+                fields=["last_name"],
+                opclasses=["gin_trgm_ops"],
+                name="theatre_actor_last_trgm",
+            ),
+        ]
 
 
 class Genre(models.Model):
@@ -31,6 +48,13 @@ class Play(models.Model):
     description = models.CharField(blank=True, max_length=255)
     actors = models.ManyToManyField(Actor, related_name="play")
     genres = models.ManyToManyField(Genre, related_name="play")
+    # kept up to date by a database trigger, see migration 0010
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="theatre_play_search_gin")
+        ]
 
     def __str__(self):
         return f"{self.title}"
@@ -44,6 +68,34 @@ class TheatreHall(models.Model):
     def __str__(self):
         return self.name
 
+    @property
+    def capacity(self):
+        return self.rows * self.seats_in_row
+
+    def save(
+        self,
+        force_insert=False,
+        force_update=False,
+        using=None,
+        update_fields=None,
+    ):
+        adding = self._state.adding
+        super(TheatreHall, self).save(
+            force_insert, force_update, using, update_fields
+        )
+        if not adding:
+            self.performance_set.update(capacity=self.capacity)
+
+
+class PerformanceQuerySet(models.QuerySet):
+    def with_tickets_available(self):
+        return self.annotate(
+            tickets_available=ExpressionWrapper(
+                F("capacity") - F("tickets_sold") - F("seats_held"),
+                output_field=IntegerField(),
+            )
+        )
+
 
 class Performance(models.Model):
     play = models.ForeignKey(Play, on_delete=models.CASCADE)
@@ -52,10 +104,78 @@ class Performance(models.Model):
         on_delete=models.DO_NOTHING,
     )
     show_time = models.DateTimeField(default=timezone.now)
+    capacity = models.PositiveIntegerField(default=0, editable=False)
+    tickets_sold = models.PositiveIntegerField(default=0, editable=False)
+    seats_held = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = PerformanceQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["show_time", "id"]),
+            models.Index(fields=["play", "show_time"]),
+        ]
 
     def __str__(self):
         return f"Title - {self.play.title}"
 
+    @staticmethod
+    def lock(performance_ids):
+        """Lock the performance rows until the end of the transaction.
+
+        Bookings of one performance are serialized while bookings of
+        other performances go on in parallel.
+        """
+        list(
+            Performance.objects.select_for_update()
+            .filter(id__in=performance_ids)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+
+    @staticmethod
+    def change_counter(counter, deltas):
+        """Apply {performance_id: delta} to one of the seat counters.
+
+        Rows are updated in id order so concurrent writers lock them
+        in the same order.
+        """
+        for performance_id in sorted(deltas):
+            Performance.objects.filter(id=performance_id).update(
+                **{counter: F(counter) + deltas[performance_id]}
+            )
+        if deltas:
+            invalidate_collection("performances")
+
+    @staticmethod
+    def change_tickets_sold(sold):
+        Performance.change_counter("tickets_sold", sold)
+
+    @staticmethod
+    def change_seats_held(held):
+        Performance.change_counter("seats_held", held)
+
+    def save(
+        self,
+        force_insert=False,
+        force_update=False,
+        using=None,
+        update_fields=None,
+    ):
+        self.capacity = self.theatre_hall.capacity
+        if update_fields is None and not self._state.adding:
+            # the counters are only written by change_counter, the ones
+            # of this instance may be outdated by bookings since it loaded
+            update_fields = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in ("tickets_sold", "seats_held")
+            ]
+        return super(Performance, self).save(
+            force_insert, force_update, using, update_fields
+        )
+
 
 class Reservation(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
@@ -64,6 +184,22 @@ class Reservation(models.Model):
         on_delete=models.CASCADE
     )
 
+    class Meta:
+        indexes = [models.Index(fields=["user", "created_at", "id"])]
+
+
+def matching_seats(queryset, seats):
+    """Subset of (performance_id, row, seat) triples found in queryset"""
+    if not seats:
+        return set()
+    performance_ids, rows, seat_numbers = zip(*seats)
+    found = queryset.filter(
+        performance_id__in=set(performance_ids),
+        row__in=set(rows),
+        seat__in=set(seat_numbers),
+    ).values_list("performance_id", "row", "seat")
+    return set(found) & set(seats)
+
 
 class Ticket(models.Model):
     row = models.IntegerField()
@@ -84,6 +220,11 @@ class Ticket(models.Model):
             f" row - {self.row}, seat - {self.seat}, "
         )
 
+    @staticmethod
+    def taken_seats(seats):
+        """Subset of (performance_id, row, seat) triples already sold"""
+        return matching_seats(Ticket.objects, seats)
+
     @staticmethod
     def validate_ticket(row, seat, theatre_hall):
         for ticket_attr_value, ticket_attr_name, theatre_hall_attr_name in [
@@ -102,11 +243,12 @@ class Ticket(models.Model):
                 )
 
     def clean(self):
-        Ticket.validate_ticket(
-            self.row,
-            self.seat,
-            self.performance.theatre_hall,
-        )
+        from theatre.hall_geometry import get_hall_geometry
+
+        geometry = get_hall_geometry(self.performance_id)
+        # an unknown performance is reported by the field validation
+        if geometry is not None:
+            Ticket.validate_ticket(self.row, self.seat, geometry)
 
     def save(
         self,
@@ -119,3 +261,88 @@ class Ticket(models.Model):
         return super(Ticket, self).save(
             force_insert, force_update, using, update_fields
         )
+
+
+class SeatHold(models.Model):
+    performance = models.ForeignKey(
+        Performance, on_delete=models.CASCADE, related_name="holds"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [models.Index(fields=["expires_at"])]
+
+    def __str__(self):
+        return f"Hold of {self.user} until {self.expires_at}"
+
+    @property
+    def is_expired(self):
+        return self.expires_at <= timezone.now()
+
+
+class HeldSeat(models.Model):
+    hold = models.ForeignKey(
+        SeatHold, on_delete=models.CASCADE, related_name="seats"
+    )
+    performance = models.ForeignKey(
+        Performance, on_delete=models.CASCADE, related_name="held_seats"
+    )
+    row = models.IntegerField()
+    seat = models.IntegerField()
+
+    class Meta:
+        unique_together = ("seat", "row", "performance")
+
+    @staticmethod
+    def active():
+        return HeldSeat.objects.filter(hold__expires_at__gt=timezone.now())
+
+    @staticmethod
+    def held_seats(seats):
+        """Subset of (performance_id, row, seat) triples under a live hold"""
+        return matching_seats(HeldSeat.active(), seats)
+
+
+class IdempotencyKey(models.Model):
+    """Response of a POST made with an ``Idempotency-Key`` header"""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE
+    )
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    response_status = models.PositiveSmallIntegerField(null=True)
+    response_body = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ("user", "key")
+        indexes = [models.Index(fields=["expires_at"])]
+
+    def __str__(self):
+        return self.key
+
+
+class ThrottleCounter(models.Model):
+    """Requests of a throttle key in one window, see
+    theatre_api_service.throttling"""
+
+    key = models.CharField(max_length=255)
+    # window start divided by its duration, and unix time when unused
+    period = models.BigIntegerField()
+    count = models.PositiveIntegerField(default=0)
+    expires = models.BigIntegerField()
+
+    class Meta:
+        unique_together = ("key", "period")
+        indexes = [models.Index(fields=["expires"])]
+
+    def __str__(self):
+        return f"{self.key}:{self.period}"
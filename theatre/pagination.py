@@ -0,0 +1,17 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class TheatreCursorPagination(CursorPagination):
+    """Keyset pagination used by every list route.
+
+    Views choose the ordering with an ``ordering`` attribute, which
+    should be backed by an index starting with the same columns.
+    """
+
+    page_size_query_param = "page_size"
+    max_page_size = settings.MAX_PAGE_SIZE
+    ordering = ("id",)
+
+    def get_ordering(self, request, queryset, view):
+        return tuple(getattr(view, "ordering", self.ordering))
@@ -0,0 +1,90 @@
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+from theatre.versions import collection_versions, invalidate_collection
+
+logger = logging.getLogger(__name__)
+
+
+def stats_key(outcome):
+    return f"theatre:response-cache:{outcome}"
+
+
+def record(outcome):
+    """Count a hit or miss, in the cache so the workers add up"""
+    key = stats_key(outcome)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def response_cache_stats():
+    counts = cache.get_many([stats_key("hit"), stats_key("miss")])
+    hits = counts.get(stats_key("hit"), 0)
+    misses = counts.get(stats_key("miss"), 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / total, 4) if total else None,
+    }
+
+
+def catalog_version():
+    return collection_versions(["catalog"])[0]
+
+
+def invalidate_catalog():
+    """Retire every cached catalog response"""
+    invalidate_collection("catalog")
+
+
+class CachedResponseMixin:
+    """Serve list and retrieve responses from the cache.
+
+    Entries are keyed by the catalog version, the full request URL and
+    the serializer class, so any catalog change retires all of them.
+    """
+
+    def response_cache_key(self, request):
+        serializer_class = self.get_serializer_class()
+        raw = "|".join(
+            (
+                request.build_absolute_uri(),
+                f"{serializer_class.__module__}.{serializer_class.__name__}",
+            )
+        )
+        digest = hashlib.md5(raw.encode()).hexdigest()
+        return f"theatre:response:{catalog_version()}:{digest}"
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key = self.response_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            record("hit")
+            logger.debug("response cache hit %s", request.path)
+            response = Response(data)
+            response["X-Cache"] = "HIT"
+            return response
+
+        record("miss")
+        logger.debug("response cache miss %s", request.path)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.CATALOG_CACHE_TIMEOUT)
+        response["X-Cache"] = "MISS"
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
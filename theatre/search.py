@@ -0,0 +1,76 @@
+import re
+from functools import reduce
+from operator import add, and_
+
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    TrigramWordSimilarity,
+)
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import Cast, Greatest
+
+SEARCH_CONFIG = "english"
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_MIN_LENGTH = 2
+
+# ranks are compared by the cursor pagination, so they are kept in
+# double precision to survive the round trip through the cursor
+RANK_ORDERING = ("-rank", "id")
+
+
+def search_words(text):
+    return re.findall(r"[^\W_]+", text)
+
+
+def search_plays(queryset, text):
+    """Plays whose title or description match text, with a rank"""
+    query = SearchQuery(text, search_type="websearch", config=SEARCH_CONFIG)
+    return queryset.filter(search_vector=query).annotate(
+        rank=Cast(SearchRank(F("search_vector"), query), FloatField())
+    )
+
+
+def search_actors(queryset, text):
+    """Actors whose names are similar to every word of text, with a rank
+
+    Each word is matched against both names with the word similarity
+    operator, which the trigram indexes on the name columns serve.
+    """
+    words = search_words(text)
+    if not words:
+        return queryset.none()
+
+    matches = [
+        Q(first_name__trigram_word_similar=word)
+        | Q(last_name__trigram_word_similar=word)
+        for word in words
+    ]
+    similarities = [
+        Greatest(
+            TrigramWordSimilarity(word, "first_name"),
+            TrigramWordSimilarity(word, "last_name"),
+        )
+        for word in words
+    ]
+    return queryset.filter(reduce(and_, matches)).annotate(
+        rank=Cast(reduce(add, similarities), FloatField())
+    )
+
+
+def autocomplete_plays(queryset, text, limit=AUTOCOMPLETE_LIMIT):
+    """Best ranked plays having words that start with the words of text"""
+    words = search_words(text)
+    if len("".join(words)) < AUTOCOMPLETE_MIN_LENGTH:
+        return queryset.none()
+
+    query = SearchQuery(
+        " & ".join(f"{word}:*" for word in words),
+        search_type="raw",
+        config=SEARCH_CONFIG,
+    )
+    return (
+        queryset.filter(search_vector=query)
+        .annotate(rank=SearchRank(F("search_vector"), query))
+        .order_by("-rank", "id")[:limit]
+    )
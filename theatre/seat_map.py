@@ -0,0 +1,136 @@
+import base64
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from theatre.models import HeldSeat, Ticket
+
+
+def seat_map_key(performance_id):
+    return f"theatre:seat-map:{performance_id}"
+
+
+def build_seat_map(performance):
+    """Occupancy of the hall as a row-major bitmap.
+
+    Bit ``(row - 1) * seats_in_row + (seat - 1)`` is set when the seat is
+    sold or held, most significant bit of each byte first.
+    """
+    hall = performance.theatre_hall
+    bitmap = bytearray((hall.rows * hall.seats_in_row + 7) // 8)
+    for queryset in (Ticket.objects, HeldSeat.active()):
+        taken = queryset.filter(performance=performance).values_list(
+            "row", "seat"
+        )
+        for row, seat in taken:
+            index = (row - 1) * hall.seats_in_row + seat - 1
+            bitmap[index >> 3] |= 0x80 >> (index & 7)
+
+    return {
+        "performance": performance.id,
+        "rows": hall.rows,
+        "seats_in_row": hall.seats_in_row,
+        "bitmap": base64.b64encode(bitmap).decode(),
+    }
+
+
+def get_seat_map(performance_id, get_performance):
+    """Cached seat map; ``get_performance`` is only called on a miss"""
+    seat_map = cache.get(seat_map_key(performance_id))
+    if seat_map is None:
+        seat_map = build_seat_map(get_performance())
+        cache.set(
+            seat_map_key(seat_map["performance"]),
+            seat_map,
+            settings.SEAT_MAP_CACHE_TIMEOUT,
+        )
+    return seat_map
+
+
+def invalidate_seat_maps(performance_ids):
+    keys = [seat_map_key(performance_id) for performance_id in performance_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+@lru_cache(maxsize=256)
+def seat_scores(rows, seats_in_row):
+    """Penalties of a hall geometry, lower is better.
+
+    Returns the penalty of every row (distance from the centre row) and
+    prefix sums of the seat penalties (distance from the centre seat), so
+    a block of seats is scored in constant time.
+    """
+    centre_row = (rows - 1) / 2
+    centre_seat = (seats_in_row - 1) / 2
+    row_penalties = [abs(row - centre_row) for row in range(rows)]
+    seat_prefix = [0.0]
+    for seat in range(seats_in_row):
+        seat_prefix.append(seat_prefix[-1] + abs(seat - centre_seat))
+    return row_penalties, seat_prefix
+
+
+def row_masks(seat_map):
+    """Free seats of every row as integers, seat 1 in the highest bit"""
+    rows, seats_in_row = seat_map["rows"], seat_map["seats_in_row"]
+    bitmap = base64.b64decode(seat_map["bitmap"])
+    padding = len(bitmap) * 8 - rows * seats_in_row
+    taken = int.from_bytes(bitmap, "big") >> padding
+    full = (1 << seats_in_row) - 1
+    return [
+        ~(taken >> ((rows - 1 - row) * seats_in_row)) & full
+        for row in range(rows)
+    ]
+
+
+def best_block(seat_map, party_size):
+    """Best block of ``party_size`` adjacent free seats in one row.
+
+    Every row is scanned as a bit mask: shifting and and-ing the free
+    mask leaves the bits of the seats that start a free block, and the
+    candidate closest to the centre of the row is picked from both sides
+    of the centre with two bit operations.
+
+    Returns ``(row, [seats])`` numbered from 1, or None.
+    """
+    rows, seats_in_row = seat_map["rows"], seat_map["seats_in_row"]
+    if not 1 <= party_size <= seats_in_row:
+        return None
+    row_penalties, seat_prefix = seat_scores(rows, seats_in_row)
+
+    centre_start = (seats_in_row - party_size) // 2
+    centre_bit = seats_in_row - 1 - centre_start
+    below_centre = (1 << (centre_bit + 1)) - 1
+
+    best = None
+    for row, free in enumerate(row_masks(seat_map)):
+        starts = free
+        for shift in range(1, party_size):
+            starts &= free << shift
+        if not starts:
+            continue
+
+        candidates = []
+        right = starts & below_centre
+        if right:
+            candidates.append(seats_in_row - right.bit_length())
+        left = starts >> (centre_bit + 1)
+        if left:
+            candidates.append(
+                seats_in_row - 1 - centre_bit - (left & -left).bit_length()
+            )
+
+        for start in candidates:
+            penalty = (
+                row_penalties[row] * party_size
+                + seat_prefix[start + party_size]
+                - seat_prefix[start]
+            )
+            if best is None or penalty < best[0]:
+                best = (penalty, row, start)
+
+    if best is None:
+        return None
+    _, row, start = best
+    return row + 1, list(range(start + 1, start + party_size + 1))
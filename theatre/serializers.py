@@ -1,5 +1,11 @@
-from django.db import transaction
+from collections import Counter
+
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
+from rest_framework.exceptions import ErrorDetail, ValidationError
+from rest_framework.settings import api_settings
+from rest_framework.utils import html
+from rest_framework.validators import UniqueTogetherValidator
 from theatre.models import (
     Play,
     Actor,
@@ -8,7 +14,13 @@ from theatre.models import (
     Genre,
     Reservation,
     Ticket,
+    SeatHold,
+    HeldSeat,
 )
+from theatre.exceptions import SeatsConflict
+from theatre.hall_geometry import get_hall_geometries, get_hall_geometry
+from theatre.holds import hold_seats
+from theatre.seat_map import invalidate_seat_maps
 
 
 class ActorSerializer(serializers.ModelSerializer):
@@ -42,7 +54,7 @@ class GenreListSerializer(GenreSerializer):
 class PlaySerializer(serializers.ModelSerializer):
     class Meta:
         model = Play
-        fields = "__all__"
+        exclude = ("search_vector",)
 
 
 class PlayListSerializer(PlaySerializer):
@@ -54,6 +66,12 @@ class PlayListSerializer(PlaySerializer):
         fields = ("id", "title", "genres", "actors", "description")
 
 
+class PlayAutocompleteSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Play
+        fields = ("id", "title")
+
+
 class PlayDetailSerializer(PlaySerializer):
     actors = ActorSerializer(many=True)
     genres = GenreSerializer(many=True)
@@ -68,7 +86,7 @@ class TheatreHallSerializer(serializers.ModelSerializer):
 class PerformanceSerializer(serializers.ModelSerializer):
     class Meta:
         model = Performance
-        fields = "__all__"
+        fields = ("id", "play", "theatre_hall", "show_time")
 
 
 class PerformanceListSerializer(PerformanceSerializer):
@@ -92,17 +110,120 @@ class PerformanceDetailSerializer(PerformanceSerializer):
     theatre_hall = TheatreHallSerializer(many=False)
 
 
+NON_FIELD_ERRORS_KEY = api_settings.NON_FIELD_ERRORS_KEY
+
+
+class PerformanceRelatedField(serializers.PrimaryKeyRelatedField):
+    """Primary key field that resolves performances from a batch loaded
+    up front by the parent list instead of one query per ticket"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.preloaded = {}
+
+    def preload(self, pks):
+        self.preloaded = self.get_queryset().in_bulk(pks)
+        get_hall_geometries(self.preloaded)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, bool):
+            try:
+                return self.preloaded[int(data)]
+            except (KeyError, TypeError, ValueError):
+                pass
+        return super().to_internal_value(data)
+
+
+class TicketBulkSerializer(serializers.ListSerializer):
+    """Validates a batch of tickets with one query for the performances
+    and their halls and one query for the seats that are already taken.
+
+    Seat uniqueness is checked here for the whole batch, so duplicates
+    inside one request are reported as well. Taken seats are reported
+    next to the field errors of the other tickets.
+    """
+
+    def to_internal_value(self, data):
+        if html.is_html_input(data):
+            data = html.parse_html_list(data, default=[])
+        if not isinstance(data, list) or not data:
+            return super().to_internal_value(data)
+
+        pks = set()
+        for item in data:
+            try:
+                pks.add(int(item["performance"]))
+            except (KeyError, TypeError, ValueError):
+                pass
+        self.child.fields["performance"].preload(pks)
+
+        tickets = []
+        errors = []
+        for item in data:
+            try:
+                tickets.append(self.child.run_validation(item))
+            except ValidationError as exc:
+                tickets.append(None)
+                errors.append(exc.detail)
+            else:
+                errors.append({})
+
+        valid = [index for index, ticket in enumerate(tickets) if ticket]
+        seat_errors = self.unique_seat_errors(
+            [tickets[index] for index in valid]
+        )
+        for index, error in zip(valid, seat_errors):
+            errors[index] = error
+        if any(errors):
+            raise ValidationError(errors)
+        return tickets
+
+    @staticmethod
+    def unique_seat_errors(tickets):
+        seats = [
+            (ticket["performance"].id, ticket["row"], ticket["seat"])
+            for ticket in tickets
+        ]
+        taken = Ticket.taken_seats(seats)
+        held = HeldSeat.held_seats(seats)
+        taken_error = ErrorDetail(
+            UniqueTogetherValidator.message.format(
+                field_names=", ".join(Ticket._meta.unique_together[0])
+            ),
+            code="unique",
+        )
+        held_error = ErrorDetail(
+            "This seat is held by another customer.", code="held"
+        )
+
+        errors = []
+        for seat in seats:
+            if seat in taken:
+                errors.append({NON_FIELD_ERRORS_KEY: [taken_error]})
+            elif seat in held:
+                errors.append({NON_FIELD_ERRORS_KEY: [held_error]})
+            else:
+                errors.append({})
+            taken.add(seat)
+        return errors
+
+
 class TicketSerializer(serializers.ModelSerializer):
+    performance = PerformanceRelatedField(queryset=Performance.objects.all())
+
     class Meta:
         model = Ticket
         fields = ("id", "row", "seat", "performance")
+        # uniqueness is validated per batch by TicketBulkSerializer
+        validators = []
+        list_serializer_class = TicketBulkSerializer
 
     def validate(self, attrs):
         data = super(TicketSerializer, self).validate(attrs=attrs)
         Ticket.validate_ticket(
             row=attrs["row"],
             seat=attrs["seat"],
-            theatre_hall=attrs["performance"].theatre_hall,
+            theatre_hall=get_hall_geometry(attrs["performance"].id),
         )
         return data
 
@@ -120,13 +241,39 @@ class ReservationSerializer(serializers.ModelSerializer):
 
     @transaction.atomic
     def create(self, validated_data):
-        with transaction.atomic():
-            tickets_data = validated_data.pop("tickets")
-            reservation = Reservation.objects.create(**validated_data)
-            for ticket_data in tickets_data:
-                Ticket.objects.create(
-                    reservation=reservation,
-                    **ticket_data)
+        tickets_data = validated_data.pop("tickets")
+        seats = [
+            (
+                ticket_data["performance"].id,
+                ticket_data["row"],
+                ticket_data["seat"],
+            )
+            for ticket_data in tickets_data
+        ]
+        sold = Counter(performance_id for performance_id, _, _ in seats)
+
+        # Seats may have been sold since validation; recheck them while
+        # holding the performance rows so the insert cannot race.
+        Performance.lock(sold)
+        lost = Ticket.taken_seats(seats) | HeldSeat.held_seats(seats)
+        if lost:
+            raise SeatsConflict(lost)
+
+        reservation = Reservation.objects.create(**validated_data)
+        try:
+            with transaction.atomic():
+                Ticket.objects.bulk_create(
+                    Ticket(reservation=reservation, **ticket_data)
+                    for ticket_data in tickets_data
+                )
+        except IntegrityError:
+            taken = Ticket.taken_seats(seats)
+            if not taken:
+                # not a lost seat, keep the original error
+                raise
+            raise SeatsConflict(taken)
+        Performance.change_tickets_sold(sold)
+        invalidate_seat_maps(sold)
         return reservation
 
 
@@ -136,3 +283,52 @@ class ReservationListSerializer(ReservationSerializer):
         read_only=False,
         allow_null=False
     )
+
+
+class HeldSeatSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = HeldSeat
+        fields = ("row", "seat")
+
+
+class SeatHoldSerializer(serializers.ModelSerializer):
+    seats = HeldSeatSerializer(many=True, allow_empty=False)
+
+    class Meta:
+        model = SeatHold
+        fields = ("id", "performance", "seats", "created_at", "expires_at")
+        read_only_fields = ("expires_at",)
+
+    def validate(self, attrs):
+        data = super(SeatHoldSerializer, self).validate(attrs=attrs)
+        theatre_hall = get_hall_geometry(attrs["performance"].id)
+        errors = []
+        seen = set()
+        for seat_data in attrs["seats"]:
+            seat = (seat_data["row"], seat_data["seat"])
+            try:
+                Ticket.validate_ticket(*seat, theatre_hall=theatre_hall)
+            except ValidationError as exc:
+                errors.append(exc.detail)
+            else:
+                errors.append(
+                    {"seat": ["This seat is listed twice."]}
+                    if seat in seen
+                    else {}
+                )
+            seen.add(seat)
+        if any(errors):
+            raise ValidationError({"seats": errors})
+        return data
+
+    def create(self, validated_data):
+        return hold_seats(
+            user=validated_data["user"],
+            performance=validated_data["performance"],
+            seats_data=validated_data["seats"],
+        )
+
+
+class BestAvailableSerializer(serializers.Serializer):
+    seats = serializers.IntegerField(min_value=1)
+    hold = serializers.BooleanField(default=False)
@@ -0,0 +1,71 @@
+from django.db.models import Count
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from theatre.models import (
+    Actor,
+    Genre,
+    Performance,
+    Play,
+    Reservation,
+    TheatreHall,
+)
+from theatre.hall_geometry import invalidate_hall_geometries
+from theatre.response_cache import invalidate_catalog
+from theatre.seat_map import invalidate_seat_maps
+from theatre.versions import invalidate_collection
+
+
+@receiver(pre_delete, sender=Reservation)
+def release_reservation_tickets(sender, instance, **kwargs):
+    sold = (
+        instance.tickets.order_by()
+        .values("performance")
+        .annotate(count=Count("id"))
+    )
+    sold = {row["performance"]: -row["count"] for row in sold}
+    Performance.change_tickets_sold(sold)
+    invalidate_seat_maps(sold)
+
+
+@receiver(post_save, sender=Play)
+@receiver(post_save, sender=Actor)
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=TheatreHall)
+@receiver(post_delete, sender=Play)
+@receiver(post_delete, sender=Actor)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=TheatreHall)
+@receiver(m2m_changed, sender=Play.actors.through)
+@receiver(m2m_changed, sender=Play.genres.through)
+def invalidate_catalog_responses(sender, **kwargs):
+    invalidate_catalog()
+
+
+@receiver(post_save, sender=Performance)
+@receiver(post_delete, sender=Performance)
+def invalidate_performances(sender, **kwargs):
+    invalidate_collection("performances")
+
+
+@receiver(post_save, sender=TheatreHall)
+def invalidate_hall_performances(sender, instance, created, **kwargs):
+    if not created:
+        performance_ids = list(
+            Performance.objects.filter(theatre_hall=instance).values_list(
+                "id", flat=True
+            )
+        )
+        invalidate_hall_geometries(performance_ids)
+        invalidate_seat_maps(performance_ids)
+
+
+@receiver(post_save, sender=Performance)
+@receiver(post_delete, sender=Performance)
+def invalidate_performance_hall(sender, instance, **kwargs):
+    invalidate_hall_geometries([instance.id])
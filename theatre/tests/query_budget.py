@@ -0,0 +1,92 @@
+"""Query budgets of the API routes.
+
+``test_query_budget`` requests every named route of theatre/urls.py,
+user/urls.py and the operational routes of the project and fails when
+a request runs more queries than the route's budget, or when a route
+has no budget yet. The throttle counter upserts run on every request
+and are budgeted apart from the routes.
+"""
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from theatre.models import ThrottleCounter
+from theatre.urls import router
+from theatre_api_service.urls import ops_urlpatterns
+from user.urls import urlpatterns as user_urlpatterns
+
+QUERY_BUDGETS = {
+    "theatre:api-root": 0,
+    "theatre:play-list": 4,
+    "theatre:play-detail": 3,
+    "theatre:play-autocomplete": 1,
+    "theatre:actor-list": 2,
+    "theatre:actor-detail": 2,
+    "theatre:performance-list": 1,
+    "theatre:performance-detail": 3,
+    "theatre:performance-seats": 3,
+    "theatre:performance-best-available": 18,
+    "theatre:genre-list": 2,
+    "theatre:genre-detail": 2,
+    "theatre:reservation-list": 3,
+    "theatre:reservation-detail": 2,
+    "theatre:theatrehall-list": 1,
+    "theatre:theatrehall-detail": 1,
+    "theatre:seathold-list": 2,
+    "theatre:seathold-detail": 2,
+    "theatre:seathold-extend": 8,
+    "theatre:seathold-confirm": 15,
+    "user:create": 2,
+    "user:token_obtain_pair": 1,
+    "user:token_refresh": 0,
+    "user:token_verify": 0,
+    "user:manage": 0,
+    "db-pool": 0,
+    "response-cache": 0,
+}
+
+
+# one counter upsert per throttle, anonymous requests pass both
+THROTTLE_QUERY_BUDGET = 2
+
+
+def route_names():
+    names = {f"theatre:{url.name}" for url in router.urls}
+    names.update(f"user:{url.name}" for url in user_urlpatterns)
+    names.update(url.name for url in ops_urlpatterns)
+    return names
+
+
+def split_queries(context):
+    """SQL of the route's own queries and of the throttle counter ones"""
+    route, throttle = [], []
+    for query in context.captured_queries:
+        if ThrottleCounter._meta.db_table in query["sql"]:
+            throttle.append(query["sql"])
+        else:
+            route.append(query["sql"])
+    return route, throttle
+
+
+@contextmanager
+def assert_route_queries(testcase, expected):
+    """assertNumQueries without the throttle counter queries"""
+    with CaptureQueriesContext(connection) as context:
+        yield
+    queries, _ = split_queries(context)
+    testcase.assertEqual(len(queries), expected, "\n".join(queries))
+
+
+def assert_query_budget(testcase, route, request):
+    """Call ``request`` and check it stays within the budget of route"""
+    with CaptureQueriesContext(connection) as context:
+        response = request()
+    queries, throttle_queries = split_queries(context)
+    testcase.assertLessEqual(
+        len(queries),
+        QUERY_BUDGETS[route],
+        f"{route} ran {len(queries)} queries:\n" + "\n".join(queries),
+    )
+    testcase.assertLessEqual(len(throttle_queries), THROTTLE_QUERY_BUDGET)
+    return response
@@ -1,4 +1,7 @@
+from unittest import skipUnless
+
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
 from django.urls import reverse
 from rest_framework import status
@@ -50,7 +53,7 @@ class AuthorizedActorApiTest(TestCase):
         serializers = ActorSerializer(plays, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializers.data)
+        self.assertEqual(res.data["results"], serializers.data)
 
     def test_retrieve_actor_detail(self):
         actor = Actor.objects.create(first_name="Test", last_name="User")
@@ -63,6 +66,20 @@ class AuthorizedActorApiTest(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
+    @skipUnless(connection.vendor == "postgresql", "trigram search")
+    def test_search_actor(self):
+        brad = sample_actor(first_name="Brad", last_name="Pitt")
+        bradley = sample_actor(first_name="Bradley", last_name="Cooper")
+        sample_actor(first_name="Leonardo", last_name="Dicaprio")
+
+        res = self.client.get(ACTOR_URL, {"search": "brad pit"})
+        self.assertEqual([actor["id"] for actor in res.data["results"]], [brad.id])
+
+        res = self.client.get(ACTOR_URL, {"search": "brad"})
+        self.assertEqual(
+            [actor["id"] for actor in res.data["results"]], [brad.id, bradley.id]
+        )
+
     def test_create_actor_forbidden(self):
         payload = {"first_name": "Test", "last_name": "User"}
 
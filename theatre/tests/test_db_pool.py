@@ -0,0 +1,169 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from theatre_api_service.pooled_postgresql.pool import (
+    ConnectionPool,
+    PoolTimeout,
+)
+
+POOL_URL = reverse("db-pool")
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.healthy = True
+
+    def close(self):
+        self.closed = True
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.opened = []
+
+    def connect(self):
+        connection = FakeConnection()
+        self.opened.append(connection)
+        return connection
+
+    def pool(self, **kwargs):
+        kwargs.setdefault("max_size", 2)
+        return ConnectionPool(
+            self.connect,
+            check=lambda connection: connection.healthy,
+            clock=self.clock,
+            **kwargs,
+        )
+
+    def test_connections_reused(self):
+        pool = self.pool()
+
+        first = pool.getconn()
+        pool.putconn(first)
+        second = pool.getconn()
+
+        self.assertIs(second, first)
+        self.assertEqual(len(self.opened), 1)
+        stats = pool.stats()
+        self.assertEqual((stats["in_use"], stats["idle"]), (1, 0))
+        self.assertEqual(stats["checkouts"], 2)
+
+    def test_unhealthy_connection_replaced(self):
+        pool = self.pool()
+        connection = pool.getconn()
+        pool.putconn(connection)
+        connection.healthy = False
+
+        replacement = pool.getconn()
+
+        self.assertIsNot(replacement, connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.stats()["checks_failed"], 1)
+        self.assertEqual(pool.stats()["size"], 1)
+
+    def test_old_and_idle_connections_recycled(self):
+        pool = self.pool(max_lifetime=100, max_idle=10)
+        connection = pool.getconn()
+        pool.putconn(connection)
+
+        self.clock.now = 11
+        idle_too_long = pool.getconn()
+        self.clock.now = 200
+        pool.putconn(idle_too_long)
+
+        self.assertIsNot(idle_too_long, connection)
+        self.assertTrue(connection.closed)
+        self.assertTrue(idle_too_long.closed)
+        self.assertEqual(pool.stats()["connections_recycled"], 2)
+        self.assertEqual(pool.stats()["size"], 0)
+
+    def test_failed_reset_discards_connection(self):
+        pool = self.pool()
+        pool.reset = lambda connection: False
+        connection = pool.getconn()
+
+        pool.putconn(connection)
+
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.stats()["resets_failed"], 1)
+
+    def test_checkout_times_out_when_exhausted(self):
+        pool = self.pool(timeout=0)
+        pool.getconn()
+        pool.getconn()
+
+        with self.assertRaises(PoolTimeout):
+            pool.getconn()
+        self.assertEqual(pool.stats()["timeouts"], 1)
+
+    def test_waiting_checkout_gets_returned_connection(self):
+        pool = ConnectionPool(self.connect, max_size=1, timeout=5)
+        connection = pool.getconn()
+        checked_out = []
+        waiter = threading.Thread(
+            target=lambda: checked_out.append(pool.getconn())
+        )
+
+        waiter.start()
+        while not pool.stats()["waiting"]:
+            pass
+        pool.putconn(connection)
+        waiter.join()
+
+        self.assertEqual(checked_out, [connection])
+
+    def test_failed_connect_frees_slot(self):
+        pool = ConnectionPool(self._fail, max_size=1, timeout=0)
+
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                pool.getconn()
+        self.assertEqual(pool.stats()["size"], 0)
+
+    def _fail(self):
+        raise ConnectionError
+
+    def test_close(self):
+        pool = self.pool()
+        idle = pool.getconn()
+        in_use = pool.getconn()
+        pool.putconn(idle)
+
+        pool.close()
+        self.assertTrue(idle.closed)
+        pool.putconn(in_use)
+        self.assertTrue(in_use.closed)
+        with self.assertRaises(PoolTimeout):
+            pool.getconn()
+
+
+class DatabasePoolViewTest(TestCase):
+    def test_staff_only(self):
+        client = APIClient()
+        user = get_user_model().objects.create_user(
+            email="test@user.com", password="testpass"
+        )
+        client.force_authenticate(user)
+
+        res = client.get(POOL_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        user.is_staff = True
+        user.save()
+        res = client.get(POOL_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
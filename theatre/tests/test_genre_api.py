@@ -1,3 +1,6 @@
+import time
+from unittest.mock import patch
+
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 from django.urls import reverse
@@ -52,7 +55,7 @@ class AuthorizedGenreApiTest(TestCase):
         serializers = GenreListSerializer(genre, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializers.data)
+        self.assertEqual(res.data["results"], serializers.data)
 
     def test_retrieve_genre_detail(self):
         genre = sample_genre()
@@ -66,6 +69,21 @@ class AuthorizedGenreApiTest(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
+    def test_list_modified_after_delete(self):
+        genre = sample_genre()
+        sample_genre(name="Action")
+        res = self.client.get(GENRE_URL)
+        etag, last_modified = res["ETag"], res["Last-Modified"]
+
+        # a second later, Last-Modified has a resolution of seconds
+        with patch("time.time_ns", return_value=time.time_ns() + 10**9):
+            genre.delete()
+
+        res = self.client.get(GENRE_URL, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertNotEqual(res["ETag"], etag)
+
     def test_create_genre_forbidden(self):
         payload = {"name": "Test"}
 
@@ -0,0 +1,68 @@
+import datetime
+import uuid
+from decimal import Decimal
+from io import BytesIO
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from theatre_api_service.parsers import FastJSONParser
+from theatre_api_service.renderers import FastJSONRenderer
+
+
+class FastJSONRendererTest(SimpleTestCase):
+    def assert_same_as_drf(self, data, media_type=None):
+        self.assertEqual(
+            FastJSONRenderer().render(data, media_type),
+            JSONRenderer().render(data, media_type),
+        )
+
+    def test_renders_like_json_renderer(self):
+        utc = datetime.timezone.utc
+        data = {
+            "show_time": datetime.datetime(2024, 2, 16, 20, 42, tzinfo=utc),
+            "created_at": datetime.datetime(2024, 2, 16, 20, 42, 1, 123456),
+            "date": datetime.date(2024, 2, 16),
+            "time": datetime.time(20, 42, 0, 5000),
+            "duration": datetime.timedelta(minutes=150),
+            "price": Decimal("12.50"),
+            "message": gettext_lazy("Not found."),
+            "id": uuid.UUID(int=1),
+            "title": "Été \u2028\u2029",
+            "rows": {1: [1, 2], 2: (3, 4)},
+            "seats": {5},
+            "sold": 2**70,
+            "ratio": 0.1,
+            "none": None,
+        }
+
+        for key, value in data.items():
+            with self.subTest(key=key):
+                self.assert_same_as_drf({key: value})
+        self.assert_same_as_drf(data)
+
+    def test_indent_and_empty(self):
+        self.assert_same_as_drf({"a": [1]}, "application/json; indent=4")
+        self.assertEqual(FastJSONRenderer().render(None), b"")
+
+
+class FastJSONParserTest(SimpleTestCase):
+    def parse(self, parser, content):
+        return parser.parse(BytesIO(content))
+
+    def test_parses_like_json_parser(self):
+        content = '{"tickets": [{"row": 1, "seat": 2.5}], "name": "Été"}'
+
+        self.assertEqual(
+            self.parse(FastJSONParser(), content.encode()),
+            self.parse(JSONParser(), content.encode()),
+        )
+
+    def test_invalid_json(self):
+        for content in (b"{", b'{"seat": NaN}'):
+            with self.subTest(content=content):
+                with self.assertRaises(ParseError):
+                    self.parse(FastJSONParser(), content)
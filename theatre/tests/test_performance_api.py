@@ -1,10 +1,15 @@
+import base64
+from io import StringIO
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import cache
+from django.core.management import call_command, CommandError
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from theatre.models import Actor, Play, TheatreHall, Performance, Ticket, Reservation
+from theatre.models import Actor, Genre, Play, TheatreHall, Performance, Ticket, Reservation
 from theatre.serializers import (
     ActorSerializer,
     ActorDetailSerializer,
@@ -12,6 +17,7 @@ from theatre.serializers import (
     PerformanceSerializer,
     PerformanceDetailSerializer,
 )
+from theatre.tests.query_budget import assert_route_queries
 
 PERFORMANCE_URL = reverse("theatre:performance-list")
 
@@ -35,6 +41,14 @@ def performance_url(performance_id: int):
     return reverse("theatre:performance-detail", args={performance_id})
 
 
+def seats_url(performance_id: int):
+    return reverse("theatre:performance-seats", args={performance_id})
+
+
+def best_available_url(performance_id: int):
+    return reverse("theatre:performance-best-available", args={performance_id})
+
+
 class UnauthorizedPerformanceApiTest(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -63,6 +77,57 @@ class AuthorizedPerformanceApiTest(TestCase):
         res = self.client.get(PERFORMANCE_URL)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
+    def test_filter_performances(self):
+        early = sample_performance(show_time="2024-02-16T18:00:00Z")
+        late = sample_performance(show_time="2024-02-18T20:00:00Z")
+        drama = Genre.objects.create(name="Drama")
+        comedy = Genre.objects.create(name="Comedy")
+        late.play.genres.add(drama, comedy)
+        actor = Actor.objects.create(first_name="Brad", last_name="Pitt")
+        early.play.actors.add(actor)
+
+        def ids(params):
+            res = self.client.get(PERFORMANCE_URL, params)
+            return [performance["id"] for performance in res.data["results"]]
+
+        self.assertEqual(ids({"show_time_after": "2024-02-17"}), [late.id])
+        self.assertEqual(ids({"show_time_before": "2024-02-16"}), [early.id])
+        self.assertEqual(ids({"play": f"{early.play.id}"}), [early.id])
+        self.assertEqual(ids({"theatre_hall": f"{late.theatre_hall.id}"}), [late.id])
+        self.assertEqual(ids({"actors": f"{actor.id}"}), [early.id])
+        self.assertEqual(ids({"genres": f"{drama.id},{comedy.id}"}), [late.id])
+
+    def test_filter_available_performances(self):
+        sold_out = sample_performance()
+        Performance.objects.filter(id=sold_out.id).update(tickets_sold=15 * 20)
+        free = sample_performance()
+
+        res = self.client.get(PERFORMANCE_URL, {"available": "true"})
+
+        self.assertEqual([performance["id"] for performance in res.data["results"]], [free.id])
+
+    def test_filter_performances_invalid_ids(self):
+        res = self.client.get(PERFORMANCE_URL, {"play": "one"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_fast_list_matches_serializers(self):
+        performance = sample_performance(show_time="2024-02-16T18:00:00Z")
+        sample_performance(show_time="2024-02-17T18:30:00+02:00")
+        reservation = Reservation.objects.create(user=self.user)
+        Ticket.objects.create(
+            row=1, seat=5, performance=performance, reservation=reservation
+        )
+        Performance.change_tickets_sold({performance.id: 1})
+
+        responses = [
+            self.client.get(PERFORMANCE_URL).content,
+        ]
+        with override_settings(FAST_LIST_SERIALIZATION=True):
+            responses.append(self.client.get(PERFORMANCE_URL).content)
+
+        self.assertEqual(responses[0], responses[1])
+
     def test_retrieve_performance_detail(self):
         sample_performance()
 
@@ -89,6 +154,7 @@ class AuthorizedPerformanceApiTest(TestCase):
 
 class AdminActorApiTest(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             email="test@user.com", password="testpass", is_staff=True
@@ -106,3 +172,220 @@ class AdminActorApiTest(TestCase):
         res = self.client.post(PERFORMANCE_URL, payload)
 
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_tickets_available_follows_reservations(self):
+        performance = sample_performance()
+        payload = {
+            "tickets": [
+                {"row": 1, "seat": 1, "performance": performance.id},
+                {"row": 1, "seat": 2, "performance": performance.id},
+            ]
+        }
+
+        res = self.client.post(
+            reverse("theatre:reservation-list"), payload, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        reservation_id = res.data["id"]
+
+        res = self.client.get(PERFORMANCE_URL)
+        self.assertEqual(res.data["results"][0]["tickets_available"], 15 * 20 - 2)
+
+        Reservation.objects.get(id=reservation_id).delete()
+
+        res = self.client.get(PERFORMANCE_URL)
+        self.assertEqual(res.data["results"][0]["tickets_available"], 15 * 20)
+
+    def test_update_keeps_counters(self):
+        performance = sample_performance()
+        Performance.change_tickets_sold({performance.id: 3})
+        Performance.change_seats_held({performance.id: 2})
+
+        # loaded before the bookings, as by a concurrent edit
+        performance.show_time = "2024-02-16 21:42:00"
+        performance.save()
+
+        performance.refresh_from_db()
+        self.assertEqual(
+            (performance.tickets_sold, performance.seats_held), (3, 2)
+        )
+
+    def test_list_etag_changes_after_booking(self):
+        performance = sample_performance()
+        etag = self.client.get(PERFORMANCE_URL)["ETag"]
+
+        res = self.client.get(PERFORMANCE_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.post(
+            reverse("theatre:reservation-list"),
+            {"tickets": [{"row": 1, "seat": 1, "performance": performance.id}]},
+            format="json",
+        )
+
+        res = self.client.get(PERFORMANCE_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_seat_map(self):
+        performance = sample_performance()
+        reservation = Reservation.objects.create(user=self.user)
+        Ticket.objects.create(row=1, seat=1, performance=performance, reservation=reservation)
+        Ticket.objects.create(row=2, seat=20, performance=performance, reservation=reservation)
+
+        res = self.client.get(seats_url(performance.id))
+        bitmap = base64.b64decode(res.data["bitmap"])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual((res.data["rows"], res.data["seats_in_row"]), (15, 20))
+        self.assertEqual(len(bitmap), (15 * 20 + 7) // 8)
+        self.assertEqual(bitmap[0], 0b10000000)
+        # row 2, seat 20 is bit 39
+        self.assertEqual(bitmap[4], 0b00000001)
+        self.assertEqual(sum(bin(byte).count("1") for byte in bitmap), 2)
+
+    def test_seat_map_cached_until_tickets_written(self):
+        performance = sample_performance()
+        self.client.get(seats_url(performance.id))
+
+        with assert_route_queries(self, 0):
+            res = self.client.get(seats_url(performance.id))
+        self.assertEqual(base64.b64decode(res.data["bitmap"])[0], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("theatre:reservation-list"),
+                {"tickets": [{"row": 1, "seat": 1, "performance": performance.id}]},
+                format="json",
+            )
+
+        res = self.client.get(seats_url(performance.id))
+        self.assertEqual(base64.b64decode(res.data["bitmap"])[0], 0b10000000)
+
+    def test_seat_map_follows_hall_resize(self):
+        performance = sample_performance()
+        self.client.get(seats_url(performance.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            performance.theatre_hall.rows = 10
+            performance.theatre_hall.save()
+
+        res = self.client.get(seats_url(performance.id))
+        self.assertEqual((res.data["rows"], res.data["seats_in_row"]), (10, 20))
+
+    def test_seat_map_not_found(self):
+        res = self.client.get(seats_url(999))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_best_available_prefers_centre(self):
+        performance = sample_performance()
+        reservation = Reservation.objects.create(user=self.user)
+        # hall is 15 x 20: take the middle of the centre row
+        Ticket.objects.create(row=8, seat=10, performance=performance, reservation=reservation)
+
+        res = self.client.post(best_available_url(performance.id), {"seats": 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["row"], 8)
+        self.assertEqual(res.data["seats"], [11, 12])
+
+    def test_best_available_hold(self):
+        performance = sample_performance()
+
+        res = self.client.post(
+            best_available_url(performance.id), {"seats": 2, "hold": True}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["seats"], [{"row": 8, "seat": 10}, {"row": 8, "seat": 11}])
+        performance.refresh_from_db()
+        self.assertEqual(performance.seats_held, 2)
+
+    def test_best_available_party_too_large(self):
+        performance = sample_performance()
+
+        res = self.client.post(best_available_url(performance.id), {"seats": 21})
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+
+
+class PerformanceCountersCommandTest(TestCase):
+    def test_sync_performance_counters(self):
+        performance = sample_performance()
+        user = get_user_model().objects.create_user(
+            email="test@user.com", password="testpass"
+        )
+        reservation = Reservation.objects.create(user=user)
+        Ticket.objects.create(
+            row=1, seat=1, performance=performance, reservation=reservation
+        )
+
+        with self.assertRaises(CommandError):
+            call_command("sync_performance_counters", "--check", stdout=StringIO())
+
+        call_command("sync_performance_counters", stdout=StringIO())
+        performance.refresh_from_db()
+
+        self.assertEqual(performance.tickets_sold, 1)
+        self.assertEqual(performance.capacity, 15 * 20)
+
+
+class GenerateLoadDataTest(TestCase):
+    options = {
+        "halls": 2,
+        "actors": 30,
+        "plays": 10,
+        "days": 2,
+        "performances_per_day": 3,
+        "users": 5,
+        "stdout": StringIO(),
+    }
+
+    def tickets(self):
+        return list(
+            Ticket.objects.order_by("id").values_list(
+                "performance__show_time",
+                "performance__theatre_hall__name",
+                "row",
+                "seat",
+                "reservation__user__email",
+            )
+        )
+
+    def test_generated_data_valid_and_deterministic(self):
+        call_command("generate_load_data", **self.options)
+        tickets = self.tickets()
+
+        self.assertEqual(Performance.objects.count(), 6)
+        self.assertEqual(get_user_model().objects.count(), 6)
+        self.assertTrue(tickets)
+        for performance in Performance.objects.select_related("theatre_hall"):
+            hall = performance.theatre_hall
+            for ticket in performance.tickets.all():
+                Ticket.validate_ticket(ticket.row, ticket.seat, hall)
+        call_command("sync_performance_counters", "--check", stdout=StringIO())
+
+        call_command("generate_load_data", flush=True, **self.options)
+        self.assertEqual(self.tickets(), tickets)
+
+    def test_existing_data_requires_flush(self):
+        call_command("generate_load_data", **self.options)
+
+        with self.assertRaisesMessage(CommandError, "use --flush"):
+            call_command("generate_load_data", **self.options)
+
+    def test_staff_users(self):
+        call_command("generate_load_data", staff_users=2, **self.options)
+
+        self.assertEqual(
+            sorted(
+                get_user_model()
+                .objects.filter(is_staff=True)
+                .values_list("email", flat=True)
+            ),
+            [
+                "load-admin@example.com",
+                "load-staff1@example.com",
+                "load-staff2@example.com",
+            ],
+        )
@@ -1,14 +1,22 @@
+from unittest import skipUnless
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from theatre.fast_list import FastListMixin
 from theatre.models import Play, Genre, Actor
 from theatre.serializers import PlaySerializer, PlayListSerializer, PlayDetailSerializer
+from theatre.tests.query_budget import assert_route_queries
 
 PLAY_URL = reverse("theatre:play-list")
+AUTOCOMPLETE_URL = reverse("theatre:play-autocomplete")
 
 
 def detail_url(play_id: int):
@@ -63,7 +71,7 @@ class AuthenticatedApiTests(TestCase):
         serializers = PlayListSerializer(plays, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializers.data)
+        self.assertEqual(res.data["results"], serializers.data)
 
     def test_filter_play_by_genre(self):
         play1 = sample_play(title="Play 1")
@@ -83,9 +91,9 @@ class AuthenticatedApiTests(TestCase):
         serializer2 = PlayListSerializer(play2)
         serializer3 = PlayListSerializer(play3)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data["results"])
+        self.assertIn(serializer2.data, res.data["results"])
+        self.assertNotIn(serializer3.data, res.data["results"])
 
     def test_filter_play_by_actor(self):
         play1 = sample_play(title="Play 1")
@@ -106,9 +114,83 @@ class AuthenticatedApiTests(TestCase):
         serializer2 = PlayListSerializer(play2)
         serializer3 = PlayListSerializer(play3)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data["results"])
+        self.assertIn(serializer2.data, res.data["results"])
+        self.assertNotIn(serializer3.data, res.data["results"])
+
+    def test_filter_play_by_genre_and_actor(self):
+        drama = Genre.objects.create(name="Drama")
+        comedy = Genre.objects.create(name="Comedy")
+        actor = Actor.objects.create(first_name="Brad", last_name="Pitt")
+
+        both = sample_play(title="Both")
+        both.genres.add(drama, comedy)
+        both.actors.add(actor)
+        genre_only = sample_play(title="Genre only")
+        genre_only.genres.add(drama)
+
+        res = self.client.get(
+            PLAY_URL, {"genres": f"{drama.id},{comedy.id}", "actors": actor.id}
+        )
+
+        # a play matching several genres is listed once
+        self.assertEqual(res.data["results"], [PlayListSerializer(both).data])
+
+    def test_list_play_facets(self):
+        drama = Genre.objects.create(name="Drama")
+        comedy = Genre.objects.create(name="Comedy")
+        actor = Actor.objects.create(first_name="Brad", last_name="Pitt")
+
+        play1 = sample_play(title="Play 1")
+        play1.genres.add(drama, comedy)
+        play1.actors.add(actor)
+        play2 = sample_play(title="Play 2")
+        play2.genres.add(drama)
+
+        res = self.client.get(PLAY_URL, {"facets": "true"})
+
+        self.assertEqual(
+            res.data["facets"],
+            {
+                "genres": [
+                    {"id": drama.id, "name": "Drama", "count": 2},
+                    {"id": comedy.id, "name": "Comedy", "count": 1},
+                ],
+                "actors": [{"id": actor.id, "name": "Brad Pitt", "count": 1}],
+            },
+        )
+
+        res = self.client.get(PLAY_URL, {"facets": "true", "actors": actor.id})
+        self.assertEqual(
+            [genre["count"] for genre in res.data["facets"]["genres"]], [1, 1]
+        )
+        self.assertNotIn("facets", self.client.get(PLAY_URL).data)
+
+    def test_fast_list_matches_serializers(self):
+        drama = Genre.objects.create(name="Drama")
+        comedy = Genre.objects.create(name="Comedy")
+        pitt = Actor.objects.create(first_name="Brad", last_name="Pitt")
+        dicaprio = Actor.objects.create(first_name="Leonardo", last_name="Dicaprio")
+        for i in range(3):
+            play = sample_play(title=f"Play {i}", description="Description")
+            play.genres.add(comedy, drama)
+            play.actors.add(dicaprio, pitt)
+        sample_play(title="Play without genre")
+        params = {"page_size": 2, "genres": drama.id}
+
+        responses = []
+        for fast in (False, True):
+            cache.clear()
+            with override_settings(FAST_LIST_SERIALIZATION=fast):
+                res = self.client.get(PLAY_URL, params)
+                next_res = self.client.get(res.data["next"])
+            responses.append((res.content, next_res.content))
+
+        self.assertEqual(responses[0], responses[1])
+
+    def test_fast_list_requires_fast_list_data(self):
+        with self.assertRaises(ImproperlyConfigured):
+            type("View", (FastListMixin,), {"fast_list_fields": ("id",)})
 
     def test_retrieve_play_detail(self):
         play = sample_play()
@@ -123,6 +205,51 @@ class AuthenticatedApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
+    def test_list_play_cached_until_catalog_changes(self):
+        play = sample_play()
+        self.client.get(PLAY_URL)
+
+        with assert_route_queries(self, 0):
+            res = self.client.get(PLAY_URL)
+        self.assertEqual(res["X-Cache"], "HIT")
+
+        play.actors.add(Actor.objects.create(first_name="Brad", last_name="Pitt"))
+
+        res = self.client.get(PLAY_URL)
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data["results"][0]["actors"], ["Brad Pitt"])
+
+    def test_response_cache_stats(self):
+        cache.clear()
+        sample_play()
+        for _ in range(3):
+            self.client.get(PLAY_URL)
+        stats_url = reverse("response-cache")
+
+        res = self.client.get(stats_url)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        res = self.client.get(stats_url)
+        self.assertEqual(
+            res.data, {"hits": 2, "misses": 1, "hit_ratio": 0.6667}
+        )
+
+    def test_list_play_not_modified(self):
+        play = sample_play()
+        res = self.client.get(PLAY_URL)
+        etag = res["ETag"]
+
+        with assert_route_queries(self, 0):
+            res = self.client.get(PLAY_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        play.genres.add(Genre.objects.create(name="Drama"))
+
+        res = self.client.get(PLAY_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
     def test_create_play_forbidden(self):
         payload = {"info": "Play"}
 
@@ -130,6 +257,59 @@ class AuthenticatedApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
 
 
+@skipUnless(connection.vendor == "postgresql", "full-text search")
+class SearchApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("test@test.com", "testpass")
+        self.client.force_authenticate(self.user)
+
+        self.hamlet = sample_play(
+            title="Hamlet", description="The prince of Denmark avenges his father"
+        )
+        self.lear = sample_play(
+            title="King Lear", description="A king divides his kingdom"
+        )
+        self.prince = sample_play(
+            title="The Little Prince", description="A pilot meets a prince"
+        )
+
+    def test_search_ranked(self):
+        res = self.client.get(PLAY_URL, {"search": "prince"})
+
+        # a title match outranks a description match
+        self.assertEqual(
+            [play["id"] for play in res.data["results"]],
+            [self.prince.id, self.hamlet.id],
+        )
+
+    def test_search_after_update(self):
+        self.lear.description = "The prince of Denmark"
+        self.lear.save()
+
+        res = self.client.get(PLAY_URL, {"search": "denmark"})
+
+        self.assertEqual(
+            {play["id"] for play in res.data["results"]},
+            {self.hamlet.id, self.lear.id},
+        )
+
+    def test_search_pages_by_rank(self):
+        res = self.client.get(PLAY_URL, {"search": "prince", "page_size": 1})
+        next_res = self.client.get(res.data["next"])
+
+        self.assertEqual(res.data["results"][0]["id"], self.prince.id)
+        self.assertEqual(next_res.data["results"][0]["id"], self.hamlet.id)
+        self.assertIsNone(next_res.data["next"])
+
+    def test_autocomplete(self):
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": "kin"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [{"id": self.lear.id, "title": "King Lear"}])
+        self.assertEqual(self.client.get(AUTOCOMPLETE_URL, {"q": "k"}).data, [])
+
+
 class AdminApiTest(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -0,0 +1,205 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from theatre.holds import hold_seats
+from theatre.models import (
+    Actor,
+    Genre,
+    Play,
+    TheatreHall,
+    Performance,
+    Reservation,
+    Ticket,
+)
+from theatre.tests.query_budget import (
+    QUERY_BUDGETS,
+    assert_query_budget,
+    route_names,
+)
+
+# answered with PostgreSQL full-text search only
+POSTGRESQL_ROUTES = {"theatre:play-autocomplete"}
+
+
+class QueryBudgetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email="admin@admin.com", password="testpass", is_staff=True
+        )
+        genres = [Genre.objects.create(name=f"Genre {i}") for i in range(3)]
+        actors = [
+            Actor.objects.create(first_name="Actor", last_name=str(i))
+            for i in range(3)
+        ]
+        hall = TheatreHall.objects.create(name="Hall", rows=10, seats_in_row=10)
+
+        cls.performances = []
+        for i in range(3):
+            play = Play.objects.create(title=f"Play {i}")
+            play.genres.set(genres)
+            play.actors.set(actors)
+            cls.performances.append(
+                Performance.objects.create(play=play, theatre_hall=hall)
+            )
+
+        for performance in cls.performances:
+            reservation = Reservation.objects.create(user=cls.user)
+            for seat in (1, 2):
+                Ticket.objects.create(
+                    reservation=reservation,
+                    performance=performance,
+                    row=1,
+                    seat=seat,
+                )
+        Performance.change_tickets_sold(
+            {performance.id: 2 for performance in cls.performances}
+        )
+        cls.reservation = reservation
+
+    def setUp(self):
+        # budgets hold for the uncached path
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.held = self.hold(2)
+
+    def hold(self, row):
+        return hold_seats(
+            user=self.user,
+            performance=self.performances[0],
+            seats_data=[{"row": row, "seat": 1}, {"row": row, "seat": 2}],
+        )
+
+    def get(self, route, *args, **params):
+        url = reverse(route, args=args)
+        return lambda: self.client.get(url, params)
+
+    def post(self, route, *args, client=None, **data):
+        client = client or self.client
+        url = reverse(route, args=args)
+        return lambda: client.post(url, data, format="json")
+
+    def route_requests(self):
+        performance = self.performances[0]
+        play = performance.play
+        refresh = RefreshToken.for_user(self.user)
+        anonymous = APIClient()
+
+        return {
+            "theatre:api-root": lambda: self.get("theatre:api-root"),
+            "theatre:play-list": lambda: self.get(
+                "theatre:play-list", facets="true"
+            ),
+            "theatre:play-detail": lambda: self.get(
+                "theatre:play-detail", play.id
+            ),
+            "theatre:play-autocomplete": lambda: self.get(
+                "theatre:play-autocomplete", q="pl"
+            ),
+            "theatre:actor-list": lambda: self.get("theatre:actor-list"),
+            "theatre:actor-detail": lambda: self.get(
+                "theatre:actor-detail", play.actors.first().id
+            ),
+            "theatre:performance-list": lambda: self.get(
+                "theatre:performance-list"
+            ),
+            "theatre:performance-detail": lambda: self.get(
+                "theatre:performance-detail", performance.id
+            ),
+            "theatre:performance-seats": lambda: self.get(
+                "theatre:performance-seats", performance.id
+            ),
+            "theatre:performance-best-available": lambda: self.post(
+                "theatre:performance-best-available",
+                performance.id,
+                seats=2,
+                hold=True,
+            ),
+            "theatre:genre-list": lambda: self.get("theatre:genre-list"),
+            "theatre:genre-detail": lambda: self.get(
+                "theatre:genre-detail", play.genres.first().id
+            ),
+            "theatre:reservation-list": lambda: self.get(
+                "theatre:reservation-list"
+            ),
+            "theatre:reservation-detail": lambda: self.get(
+                "theatre:reservation-detail", self.reservation.id
+            ),
+            "theatre:theatrehall-list": lambda: self.get(
+                "theatre:theatrehall-list"
+            ),
+            "theatre:theatrehall-detail": lambda: self.get(
+                "theatre:theatrehall-detail", performance.theatre_hall_id
+            ),
+            "theatre:seathold-list": lambda: self.get("theatre:seathold-list"),
+            "theatre:seathold-detail": lambda: self.get(
+                "theatre:seathold-detail", self.held.id
+            ),
+            "theatre:seathold-extend": lambda: self.post(
+                "theatre:seathold-extend", self.held.id
+            ),
+            "theatre:seathold-confirm": lambda: self.post(
+                "theatre:seathold-confirm", self.hold(5).id
+            ),
+            "user:create": lambda: self.post(
+                "user:create", email="new@user.com", password="newpass12"
+            ),
+            "user:token_obtain_pair": lambda: self.post(
+                "user:token_obtain_pair",
+                client=anonymous,
+                email="admin@admin.com",
+                password="testpass",
+            ),
+            "user:token_refresh": lambda: self.post(
+                "user:token_refresh", client=anonymous, refresh=str(refresh)
+            ),
+            "user:token_verify": lambda: self.post(
+                "user:token_verify",
+                client=anonymous,
+                token=str(refresh.access_token),
+            ),
+            "user:manage": lambda: self.get("user:manage"),
+            "db-pool": lambda: self.get("db-pool"),
+            "response-cache": lambda: self.get("response-cache"),
+        }
+
+    def test_every_route_has_budget(self):
+        self.assertEqual(route_names(), set(QUERY_BUDGETS))
+        self.assertEqual(set(self.route_requests()), set(QUERY_BUDGETS))
+
+    def test_routes_within_query_budget(self):
+        for route, prepare in self.route_requests().items():
+            if (
+                route in POSTGRESQL_ROUTES
+                and connection.vendor != "postgresql"
+            ):
+                continue
+            with self.subTest(route=route):
+                cache.clear()
+                response = assert_query_budget(self, route, prepare())
+                self.assertLess(
+                    response.status_code,
+                    status.HTTP_400_BAD_REQUEST,
+                    response.content,
+                )
+
+    @override_settings(QUERY_INSTRUMENTATION=True)
+    def test_query_instrumentation_headers(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        with self.assertLogs("theatre_api_service.middleware") as logs:
+            res = client.get(reverse("theatre:play-list"))
+
+        # the route's 3 queries and the throttle counter
+        self.assertEqual(res["X-DB-Queries"], "4")
+        self.assertRegex(res["Server-Timing"], r'^db;dur=[\d.]+;desc="4 queries"')
+        self.assertIn("queries=4", logs.output[0])
+        self.assertEqual(logs.records[0].queries, 4)
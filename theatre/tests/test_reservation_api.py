@@ -1,12 +1,26 @@
 import json
+from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from theatre.models import Actor, Play, TheatreHall, Performance, Ticket, Reservation
+from theatre.exceptions import SeatsConflict
+from theatre.hall_geometry import get_hall_geometry
+from theatre.pagination import TheatreCursorPagination
+from theatre.models import (
+    Actor,
+    Play,
+    TheatreHall,
+    Performance,
+    Ticket,
+    Reservation,
+    IdempotencyKey,
+)
 from theatre.serializers import (
     ActorSerializer,
     ActorDetailSerializer,
@@ -15,6 +29,7 @@ from theatre.serializers import (
     TheatreHallSerializer,
     ReservationSerializer,
 )
+from theatre.tests.query_budget import assert_route_queries
 
 RESERVATION_URL = reverse("theatre:reservation-list")
 
@@ -81,3 +96,240 @@ class AdminActorApiTest(TestCase):
         print(res.data["tickets"][0]["seat"])
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_reservation_tickets_created_in_bulk(self):
+        performance = sample_performance()
+
+        payload = {
+            "tickets": [
+                {"row": 1, "seat": seat, "performance": performance.id}
+                for seat in range(1, 21)
+            ]
+        }
+        # the hall geometry is cached once the performance was booked
+        get_hall_geometry(performance.id)
+
+        with assert_route_queries(self, 14):
+            res = self.client.post(RESERVATION_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Ticket.objects.filter(performance=performance).count(), 20)
+
+    def test_ticket_validation_without_hall_queries(self):
+        performance = sample_performance()
+        payload = {"tickets": [{"row": 1, "seat": 1, "performance": performance.id}]}
+        self.client.post(RESERVATION_URL, payload, format="json")
+        payload["tickets"][0]["seat"] = 2
+
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.post(RESERVATION_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        hall_queries = [
+            query["sql"]
+            for query in context
+            if "theatre_theatrehall" in query["sql"]
+        ]
+        self.assertEqual(hall_queries, [])
+
+    def test_hall_resize_revalidates_seats(self):
+        performance = sample_performance()
+        payload = {"tickets": [{"row": 1, "seat": 1, "performance": performance.id}]}
+        self.client.post(RESERVATION_URL, payload, format="json")
+
+        performance.theatre_hall.seats_in_row = 10
+        performance.theatre_hall.save()
+        payload["tickets"][0]["seat"] = 12
+
+        res = self.client.post(RESERVATION_URL, payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_taken_seat_rejected(self):
+        performance = sample_performance()
+        reservation = Reservation.objects.create(user=self.user)
+        Ticket.objects.create(row=1, seat=1, performance=performance, reservation=reservation)
+
+        payload = {
+            "tickets": [
+                {"row": 1, "seat": 2, "performance": performance.id},
+                {"row": 1, "seat": 1, "performance": performance.id},
+            ]
+        }
+
+        res = self.client.post(RESERVATION_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["tickets"][0], {})
+        self.assertIn("non_field_errors", res.data["tickets"][1])
+
+    def test_taken_seat_reported_with_field_errors(self):
+        performance = sample_performance()
+        reservation = Reservation.objects.create(user=self.user)
+        Ticket.objects.create(row=1, seat=1, performance=performance, reservation=reservation)
+
+        payload = {
+            "tickets": [
+                {"row": 1, "seat": 1, "performance": performance.id},
+                {"row": 11, "seat": 2, "performance": performance.id},
+                {"row": 1, "seat": 3, "performance": performance.id},
+            ]
+        }
+
+        res = self.client.post(RESERVATION_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["tickets"][0]["non_field_errors"][0].code, "unique")
+        self.assertIn("row", res.data["tickets"][1])
+        self.assertEqual(res.data["tickets"][2], {})
+
+    def test_duplicate_seat_in_payload_rejected(self):
+        performance = sample_performance()
+
+        payload = {
+            "tickets": [
+                {"row": 3, "seat": 3, "performance": performance.id},
+                {"row": 3, "seat": 3, "performance": performance.id},
+            ]
+        }
+
+        res = self.client.post(RESERVATION_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["tickets"][0], {})
+        self.assertIn("non_field_errors", res.data["tickets"][1])
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_seat_lost_after_validation_conflicts(self):
+        performance = sample_performance()
+        payload = {
+            "tickets": [
+                {"row": 2, "seat": 1, "performance": performance.id},
+                {"row": 2, "seat": 2, "performance": performance.id},
+            ]
+        }
+        serializer = ReservationSerializer(data=payload)
+        self.assertTrue(serializer.is_valid())
+
+        other = Reservation.objects.create(user=self.user)
+        Ticket.objects.create(row=2, seat=2, performance=performance, reservation=other)
+
+        with self.assertRaises(SeatsConflict) as conflict:
+            serializer.save(user=self.user)
+
+        self.assertEqual(conflict.exception.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            conflict.exception.detail["seats"],
+            [{"performance": performance.id, "row": 2, "seat": 2}],
+        )
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_integrity_error_without_taken_seats_not_a_conflict(self):
+        performance = sample_performance()
+        payload = {"tickets": [{"row": 2, "seat": 1, "performance": performance.id}]}
+        serializer = ReservationSerializer(data=payload)
+        self.assertTrue(serializer.is_valid())
+
+        with patch.object(
+            Ticket.objects, "bulk_create", side_effect=IntegrityError
+        ):
+            with self.assertRaises(IntegrityError):
+                serializer.save(user=self.user)
+
+    def test_idempotent_reservation_replayed(self):
+        performance = sample_performance()
+        payload = {"tickets": [{"row": 4, "seat": 4, "performance": performance.id}]}
+
+        first = self.client.post(
+            RESERVATION_URL, payload, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+        )
+        with assert_route_queries(self, 3):
+            second = self.client.post(
+                RESERVATION_URL, payload, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+            )
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_idempotency_key_reused_with_other_payload(self):
+        performance = sample_performance()
+        self.client.post(
+            RESERVATION_URL,
+            {"tickets": [{"row": 4, "seat": 4, "performance": performance.id}]},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY="abc",
+        )
+
+        res = self.client.post(
+            RESERVATION_URL,
+            {"tickets": [{"row": 4, "seat": 5, "performance": performance.id}]},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY="abc",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_failed_request_does_not_store_key(self):
+        performance = sample_performance()
+
+        res = self.client.post(
+            RESERVATION_URL,
+            {"tickets": [{"row": 4, "seat": 99, "performance": performance.id}]},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY="abc",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_reservation_list_cursor_pagination(self):
+        for _ in range(15):
+            Reservation.objects.create(user=self.user)
+
+        first = self.client.get(RESERVATION_URL)
+        second = self.client.get(first.data["next"])
+
+        first_ids = [reservation["id"] for reservation in first.data["results"]]
+        second_ids = [reservation["id"] for reservation in second.data["results"]]
+        self.assertEqual(len(first_ids), 10)
+        self.assertEqual(len(second_ids), 5)
+        self.assertEqual(first_ids + second_ids, list(range(15, 0, -1)))
+        self.assertIsNone(second.data["next"])
+
+    def test_page_size_capped(self):
+        for _ in range(3):
+            Reservation.objects.create(user=self.user)
+
+        with patch.object(TheatreCursorPagination, "max_page_size", 2):
+            res = self.client.get(RESERVATION_URL, {"page_size": 50})
+
+        self.assertEqual(len(res.data["results"]), 2)
+
+    def test_reservation_list_constant_queries(self):
+        performances = [sample_performance() for _ in range(10)]
+        reservations = Reservation.objects.bulk_create(
+            Reservation(user=self.user) for _ in range(100)
+        )
+        Ticket.objects.bulk_create(
+            Ticket(
+                reservation=reservation,
+                performance=performances[index % 10],
+                row=index // 25 + 1,
+                seat=index % 25 + 1,
+            )
+            for index, reservation in enumerate(reservations)
+        )
+        Performance.change_tickets_sold({performance.id: 10 for performance in performances})
+
+        # reservations, tickets and performances with their play and hall
+        with assert_route_queries(self, 3):
+            res = self.client.get(RESERVATION_URL, {"page_size": 100})
+
+        self.assertEqual(len(res.data["results"]), 100)
+        performance = res.data["results"][0]["tickets"][0]["performance"]
+        self.assertEqual(performance["play"], "Test Play")
+        self.assertEqual(performance["theatre_hall"], "Big Hall")
+        self.assertEqual(performance["tickets_available"], 240)
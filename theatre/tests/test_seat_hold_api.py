@@ -0,0 +1,142 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from theatre.models import Play, TheatreHall, Performance, Ticket, SeatHold, HeldSeat
+
+HOLD_URL = reverse("theatre:seathold-list")
+RESERVATION_URL = reverse("theatre:reservation-list")
+PERFORMANCE_URL = reverse("theatre:performance-list")
+
+
+def hold_url(hold_id: int, action: str):
+    return reverse(f"theatre:seathold-{action}", args={hold_id})
+
+
+def sample_performance(**params):
+    play = Play.objects.create(title="Test Play")
+    theatre_hall = TheatreHall.objects.create(name="Big Hall", rows=10, seats_in_row=10)
+    defaults = {"play": play, "theatre_hall": theatre_hall}
+
+    defaults.update(params)
+
+    return Performance.objects.create(**defaults)
+
+
+class SeatHoldApiTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="admin@admin.com", password="testpass", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        self.performance = sample_performance()
+
+    def hold(self, *seats):
+        return self.client.post(
+            HOLD_URL,
+            {
+                "performance": self.performance.id,
+                "seats": [{"row": row, "seat": seat} for row, seat in seats],
+            },
+            format="json",
+        )
+
+    def test_hold_counts_as_unavailable(self):
+        res = self.hold((1, 1), (1, 2))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        res = self.client.get(PERFORMANCE_URL)
+        self.assertEqual(res.data["results"][0]["tickets_available"], 100 - 2)
+
+    def test_held_seat_rejected_at_hold_time(self):
+        self.hold((1, 1))
+
+        res = self.hold((1, 2), (1, 1))
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            res.data["seats"], [{"performance": self.performance.id, "row": 1, "seat": 1}]
+        )
+
+    def test_held_seat_rejected_for_reservation(self):
+        self.hold((1, 1))
+
+        res = self.client.post(
+            RESERVATION_URL,
+            {"tickets": [{"row": 1, "seat": 1, "performance": self.performance.id}]},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_hold_validation(self):
+        res = self.hold((1, 11), (2, 2), (2, 2))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("seat", res.data["seats"][0])
+        self.assertEqual(res.data["seats"][1], {})
+        self.assertIn("seat", res.data["seats"][2])
+
+    def test_confirm_hold(self):
+        hold_id = self.hold((3, 3), (3, 4)).data["id"]
+
+        res = self.client.post(hold_url(hold_id, "confirm"))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data["tickets"]), 2)
+        self.assertFalse(SeatHold.objects.exists())
+        self.performance.refresh_from_db()
+        self.assertEqual((self.performance.tickets_sold, self.performance.seats_held), (2, 0))
+
+    def test_expired_hold_cannot_be_confirmed(self):
+        hold_id = self.hold((3, 3)).data["id"]
+        SeatHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        res = self.client.post(hold_url(hold_id, "confirm"))
+
+        self.assertEqual(res.status_code, status.HTTP_410_GONE)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_extend_hold(self):
+        hold_id = self.hold((3, 3)).data["id"]
+        SeatHold.objects.update(expires_at=timezone.now() + timedelta(minutes=1))
+
+        res = self.client.post(hold_url(hold_id, "extend"))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertGreater(
+            SeatHold.objects.get(id=hold_id).expires_at,
+            timezone.now() + timedelta(minutes=5),
+        )
+
+    def test_release_hold(self):
+        hold_id = self.hold((3, 3)).data["id"]
+
+        res = self.client.delete(hold_url(hold_id, "detail"))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(HeldSeat.objects.exists())
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.seats_held, 0)
+
+    def test_release_expired_holds_command(self):
+        self.hold((1, 1))
+        self.hold((1, 2), (1, 3))
+        SeatHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.hold((1, 4))
+
+        call_command("release_expired_holds", "--batch-size", "1", stdout=StringIO())
+
+        self.assertEqual(HeldSeat.objects.count(), 1)
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.seats_held, 1)
@@ -53,7 +53,7 @@ class AuthorizedTheatreHallApiTest(TestCase):
         serializer = TheatreHallSerializer(theatre_hall, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_retrieve_theatre_hall_detail(self):
         theatre_hall = sample_theatre_hall()
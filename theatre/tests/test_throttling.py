@@ -0,0 +1,108 @@
+import io
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from theatre.models import ThrottleCounter
+from theatre_api_service.throttling import UserRateThrottle
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class SlidingWindowThrottleTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@user.com", password="testpass"
+        )
+        self.clock = Clock(6000)
+
+    def throttle(self, rate="4/minute"):
+        throttle = UserRateThrottle()
+        throttle.rate = rate
+        throttle.num_requests, throttle.duration = throttle.parse_rate(
+            throttle.rate
+        )
+        throttle.timer = self.clock
+        return throttle
+
+    def allow(self, rate="4/minute"):
+        request = Request(APIRequestFactory().get("/"))
+        request.user = self.user
+        throttle = self.throttle(rate)
+        return throttle.allow_request(request, None), throttle
+
+    def test_limit_within_window(self):
+        for _ in range(4):
+            self.assertTrue(self.allow()[0])
+
+        allowed, throttle = self.allow()
+
+        self.assertFalse(allowed)
+        self.assertEqual(throttle.wait(), 60)
+        # a counter per window instead of a history of requests, the
+        # throttled request is not counted
+        counter = ThrottleCounter.objects.get()
+        self.assertEqual(
+            (counter.key, counter.period, counter.count),
+            (throttle.key, 100, 4),
+        )
+
+    def test_zero_rate_throttles_without_retry_after(self):
+        allowed, throttle = self.allow("0/day")
+
+        self.assertFalse(allowed)
+        self.assertIsNone(throttle.wait())
+
+    def test_previous_window_slides_out(self):
+        for _ in range(4):
+            self.allow()
+
+        # 10 s into the next window 5/6 of the previous one still counts
+        self.clock.now += 70
+        self.assertTrue(self.allow()[0])
+        allowed, throttle = self.allow()
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(throttle.wait(), 5)
+
+        self.clock.now += 6
+        self.assertTrue(self.allow()[0])
+
+        # two windows later nothing is left
+        self.clock.now += 120
+        self.assertTrue(all(self.allow()[0] for _ in range(4)))
+
+    def test_counter_expires_after_next_window(self):
+        self.allow()
+
+        counter = ThrottleCounter.objects.get()
+        # still the previous window until 6120
+        self.assertEqual(counter.expires, 6120)
+
+    def test_expired_counters_cleared(self):
+        now = int(time.time())
+        ThrottleCounter.objects.create(key="a", period=1, expires=now - 1)
+        ThrottleCounter.objects.create(key="a", period=2, expires=now + 60)
+
+        call_command("clear_throttle_counters", stdout=io.StringIO())
+
+        self.assertEqual(
+            list(ThrottleCounter.objects.values_list("period", flat=True)),
+            [2],
+        )
+
+    def test_all_counters_cleared(self):
+        self.allow()
+
+        call_command("clear_throttle_counters", "--all", stdout=io.StringIO())
+
+        self.assertFalse(ThrottleCounter.objects.exists())
@@ -9,6 +9,7 @@ from theatre.views import (
     GenreViewSet,
     ReservationViewSet,
     TheatreHallViewSet,
+    SeatHoldViewSet,
 )
 
 router = routers.DefaultRouter()
@@ -18,6 +19,7 @@ router.register("performances", PerformanceViewSet)
 router.register("genres", GenreViewSet)
 router.register("reservation", ReservationViewSet, basename="reservation")
 router.register("theatre_hall", TheatreHallViewSet, basename="theatrehall")
+router.register("holds", SeatHoldViewSet, basename="seathold")
 
 
 urlpatterns = [path("", include(router.urls))]
@@ -0,0 +1,43 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def version_key(name):
+    return f"theatre:{name}-version"
+
+
+def collection_versions(names):
+    """Version of every named collection, in one cache round trip.
+
+    A version is the time of the last change in nanoseconds, or later
+    when changes come faster than the clock.
+    """
+    keys = [version_key(name) for name in names]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _bump_version(name):
+    key = version_key(name)
+    now = time.time_ns()
+    try:
+        if cache.incr(key) < now:
+            cache.set(key, now, None)
+    except ValueError:
+        cache.set(key, now, None)
+
+
+def invalidate_collection(name):
+    """Give the named collection a new version.
+
+    The version is bumped right away and again after commit, so nothing
+    derived from pre-commit data outlives the write.
+    """
+    _bump_version(name)
+    transaction.on_commit(lambda: _bump_version(name))
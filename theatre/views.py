@@ -1,8 +1,10 @@
-from django.db.models import Count, F, ExpressionWrapper, IntegerField
+from django.db.models import Prefetch
 from django.urls import reverse
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
-from rest_framework import viewsets, mixins
-from rest_framework.pagination import PageNumberPagination
+from rest_framework import viewsets, mixins, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
 
 from theatre.permissions import IsAdminOrIfAuthenticatedReadOnly
 
@@ -12,12 +14,37 @@ from theatre.models import (
     Performance,
     Genre,
     Reservation,
-    TheatreHall
+    TheatreHall,
+    SeatHold,
 )
+from theatre.conditional import ConditionalGetMixin
+from theatre.exceptions import NoAdjacentSeats
+from theatre.fast_list import (
+    FastListMixin,
+    datetime_representation,
+    related_values,
+)
+from theatre.filters import (
+    bool_param,
+    filter_performances,
+    filter_plays,
+    play_facets,
+)
+from theatre.holds import confirm_hold, extend_hold, hold_seats, release_holds
+from theatre.idempotency import IDEMPOTENCY_HEADER, idempotent_response
+from theatre.response_cache import CachedResponseMixin
+from theatre.search import (
+    RANK_ORDERING,
+    autocomplete_plays,
+    search_actors,
+    search_plays,
+)
+from theatre.seat_map import best_block, get_seat_map
 from theatre.serializers import (
     PlaySerializer,
     PlayListSerializer,
     PlayDetailSerializer,
+    PlayAutocompleteSerializer,
     ActorSerializer,
     PerformanceSerializer,
     GenreSerializer,
@@ -28,21 +55,65 @@ from theatre.serializers import (
     PerformanceListSerializer,
     PerformanceDetailSerializer,
     ReservationListSerializer,
+    SeatHoldSerializer,
+    BestAvailableSerializer,
 )
 
 
-class ActorViewSet(viewsets.ModelViewSet):
+class ActorViewSet(
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    FastListMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Actor.objects.prefetch_related("play")
     serializer_class = ActorSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    conditional_collections = ("catalog",)
+    fast_list_fields = ("id", "first_name", "last_name")
+
+    def fast_list_data(self, rows):
+        return [
+            {
+                "id": row["id"],
+                "first_name": row["first_name"],
+                "last_name": row["last_name"],
+            }
+            for row in rows
+        ]
+
+    def get_queryset(self):
+        queryset = self.queryset
+        search = self.request.query_params.get("search")
+        if search and self.action == "list":
+            queryset = search_actors(queryset, search)
+            self.ordering = RANK_ORDERING
+        return queryset
 
     def get_serializer_class(self):
         if self.action == "retrieve":
             return ActorDetailSerializer
         return ActorSerializer
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "search",
+                type=OpenApiTypes.STR,
+                description=(
+                    "Actors with names similar to every word, best match "
+                    "first (ex. ?search=brad pit)"
+                ),
+            ),
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
 
 class GenreViewSet(
+    ConditionalGetMixin,
+    CachedResponseMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
@@ -51,6 +122,7 @@ class GenreViewSet(
     queryset = Genre.objects.prefetch_related("play")
     serializer_class = GenreSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    conditional_collections = ("catalog",)
 
     def get_serializer_class(self):
         if self.action in ("list", "retrieve"):
@@ -59,32 +131,58 @@ class GenreViewSet(
 
 
 class PlaysViewSet(
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    FastListMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.ListModelMixin,
     viewsets.GenericViewSet,
 ):
-    queryset = Play.objects.prefetch_related("actors", "genres")
+    # related objects in id order, which the fast list path reproduces
+    queryset = Play.objects.prefetch_related(
+        Prefetch("actors", queryset=Actor.objects.order_by("id")),
+        Prefetch("genres", queryset=Genre.objects.order_by("id")),
+    ).defer("search_vector")
     serializer_class = PlaySerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    conditional_collections = ("catalog",)
+    fast_list_fields = ("id", "title", "description")
 
-    @staticmethod
-    def _param_to_int(qs):
-        return [int(str_id) for str_id in qs.split(",")]
+    def fast_list_data(self, rows):
+        ids = [row["id"] for row in rows]
+        genres = related_values(
+            Play.genres.through, "play_id", ids, "genre__name",
+            order_by="genre_id",
+        )
+        actors = related_values(
+            Play.actors.through,
+            "play_id",
+            ids,
+            "actor__first_name",
+            "actor__last_name",
+            order_by="actor_id",
+        )
+        return [
+            {
+                "id": row["id"],
+                "title": row["title"],
+                "genres": [name for name, in genres[row["id"]]],
+                "actors": [
+                    f"{first_name} {last_name}"
+                    for first_name, last_name in actors[row["id"]]
+                ],
+                "description": row["description"],
+            }
+            for row in rows
+        ]
 
     def get_queryset(self):
-        genres = self.request.query_params.get("genres")
-        actors = self.request.query_params.get("actors")
-        queryset = self.queryset
-
-        if genres:
-            genre_ids = self._param_to_int(genres)
-
-            queryset = self.queryset.filter(genres__id__in=genre_ids)
-        if actors:
-            actor_ids = self._param_to_int(actors)
-            queryset = self.queryset.filter(actors__id__in=actor_ids)
-
+        queryset = filter_plays(self.queryset, self.request)
+        search = self.request.query_params.get("search")
+        if search and self.action == "list":
+            queryset = search_plays(queryset, search)
+            self.ordering = RANK_ORDERING
         return queryset
 
     def get_serializer_class(self):
@@ -92,6 +190,8 @@ class PlaysViewSet(
             return PlayListSerializer
         if self.action == "retrieve":
             return PlayDetailSerializer
+        if self.action == "autocomplete":
+            return PlayAutocompleteSerializer
         return PlaySerializer
 
     # Only for documentation purposes
@@ -107,26 +207,98 @@ class PlaysViewSet(
                 type={"type": "list", "items": {"type": "number"}},
                 description="Filter by genres id (ex. ?actors=1,2)",
             ),
+            OpenApiParameter(
+                "title",
+                type=OpenApiTypes.STR,
+                description="Filter by part of the title (ex. ?title=king)",
+            ),
+            OpenApiParameter(
+                "search",
+                type=OpenApiTypes.STR,
+                description=(
+                    "Full-text search in titles and descriptions, best "
+                    "match first (ex. ?search=prince denmark)"
+                ),
+            ),
+            OpenApiParameter(
+                "facets",
+                type=OpenApiTypes.BOOL,
+                description=(
+                    "Add per-genre and per-actor counts of the matching "
+                    "plays to the response"
+                ),
+            ),
         ]
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if bool_param(self.request, "facets"):
+            response.data["facets"] = play_facets(
+                self.filter_queryset(self.get_queryset())
+            )
+        return response
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "q",
+                type=OpenApiTypes.STR,
+                description=(
+                    "Beginning of the words of a title or description "
+                    "(ex. ?q=haml)"
+                ),
+            ),
+        ]
+    )
+    @action(methods=["GET"], detail=False, url_path="autocomplete")
+    def autocomplete(self, request):
+        """Best matching plays for a search box as the user types"""
+        return self.cached_response(self.suggestions, request)
+
+    def suggestions(self, request):
+        plays = autocomplete_plays(
+            Play.objects.only("id", "title"), request.query_params.get("q", "")
+        )
+        return Response(self.get_serializer(plays, many=True).data)
 
-class PerformanceViewSet(viewsets.ModelViewSet):
+
+class PerformanceViewSet(
+    ConditionalGetMixin, FastListMixin, viewsets.ModelViewSet
+):
     queryset = Performance.objects.select_related("play", "theatre_hall")
     serializer_class = PerformanceSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    ordering = ("show_time", "id")
+    conditional_collections = ("catalog", "performances")
+    fast_list_fields = (
+        "id",
+        "play__title",
+        "theatre_hall__name",
+        "tickets_available",
+        "show_time",
+    )
+
+    def fast_list_data(self, rows):
+        show_time = datetime_representation()
+        return [
+            {
+                "id": row["id"],
+                "play": row["play__title"],
+                "theatre_hall": row["theatre_hall__name"],
+                "tickets_available": row["tickets_available"],
+                "show_time": show_time(row["show_time"]),
+            }
+            for row in rows
+        ]
 
     def get_queryset(self):
         queryset = self.queryset
         if self.action == "list":
-            queryset = queryset.prefetch_related("tickets").annotate(
-                tickets_available=ExpressionWrapper(
-                    F("theatre_hall__rows") * F("theatre_hall__seats_in_row")
-                    - Count("tickets"),
-                    output_field=IntegerField(),
-                )
+            queryset = filter_performances(
+                queryset.with_tickets_available(), self.request
             )
         return queryset
 
@@ -137,31 +309,159 @@ class PerformanceViewSet(viewsets.ModelViewSet):
             return PerformanceDetailSerializer
         return PerformanceSerializer
 
+    # Only for documentation purposes
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "show_time_after",
+                type=OpenApiTypes.DATETIME,
+                description=(
+                    "Performances from this date or datetime "
+                    "(ex. ?show_time_after=2024-02-16)"
+                ),
+            ),
+            OpenApiParameter(
+                "show_time_before",
+                type=OpenApiTypes.DATETIME,
+                description=(
+                    "Performances before this datetime or up to the end "
+                    "of this date (ex. ?show_time_before=2024-02-20)"
+                ),
+            ),
+            OpenApiParameter(
+                "play",
+                type={"type": "list", "items": {"type": "number"}},
+                description="Filter by plays id (ex. ?play=1,2)",
+            ),
+            OpenApiParameter(
+                "theatre_hall",
+                type={"type": "list", "items": {"type": "number"}},
+                description="Filter by theatre halls id (ex. ?theatre_hall=1)",
+            ),
+            OpenApiParameter(
+                "actors",
+                type={"type": "list", "items": {"type": "number"}},
+                description="Filter by actors id (ex. ?actors=1,2)",
+            ),
+            OpenApiParameter(
+                "genres",
+                type={"type": "list", "items": {"type": "number"}},
+                description="Filter by genres id (ex. ?genres=1,2)",
+            ),
+            OpenApiParameter(
+                "available",
+                type=OpenApiTypes.BOOL,
+                description="Only performances with free seats",
+            ),
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @extend_schema(
+        description=(
+            "Seat occupancy of the performance as a base64 row-major "
+            "bitmap: bit (row - 1) * seats_in_row + (seat - 1) is set when "
+            "the seat is taken, most significant bit of each byte first."
+        )
+    )
+    @action(methods=["GET"], detail=True, url_path="seats")
+    def seats(self, request, pk=None):
+        return Response(get_seat_map(pk, self.get_object))
+
+    @extend_schema(
+        request=BestAvailableSerializer,
+        description=(
+            "Best block of adjacent seats in one row, centre rows and "
+            "centre seats first. With hold=true the block is held for "
+            "the user and the hold is returned."
+        ),
+    )
+    @action(methods=["POST"], detail=True, url_path="best-available")
+    def best_available(self, request, pk=None):
+        serializer = BestAvailableSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        party_size = serializer.validated_data["seats"]
 
-class ReservationPagination(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = "page_size"
+        seat_map = get_seat_map(pk, self.get_object)
+        block = best_block(seat_map, party_size)
+        if block is None:
+            raise NoAdjacentSeats()
+        row, seats = block
+
+        if not serializer.validated_data["hold"]:
+            return Response(
+                {
+                    "performance": seat_map["performance"],
+                    "row": row,
+                    "seats": seats,
+                }
+            )
+
+        hold = hold_seats(
+            user=request.user,
+            performance=self.get_object(),
+            seats_data=[{"row": row, "seat": seat} for seat in seats],
+        )
+        return Response(
+            SeatHoldSerializer(hold).data, status=status.HTTP_201_CREATED
+        )
 
 
 class ReservationViewSet(viewsets.ModelViewSet):
     queryset = Reservation.objects.all()
     serializer_class = ReservationSerializer
-    pagination_class = ReservationPagination
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    ordering = ("-created_at", "-id")
 
     def get_queryset(self):
         queryset = self.queryset.filter(user=self.request.user)
 
         if self.action == "list":
-            queryset = queryset.prefetch_related("tickets__performance__play")
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "tickets__performance",
+                    queryset=Performance.objects.select_related(
+                        "play", "theatre_hall"
+                    ).with_tickets_available(),
+                )
+            )
 
         return queryset
 
+    def get_serializer_class(self):
+        if self.action == "list":
+            return ReservationListSerializer
+        return ReservationSerializer
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                IDEMPOTENCY_HEADER,
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.HEADER,
+                description=(
+                    "Repeating a request with the same key returns the "
+                    "first response instead of booking again"
+                ),
+            ),
+        ]
+    )
+    def create(self, request, *args, **kwargs):
+        def run():
+            return super(ReservationViewSet, self).create(
+                request, *args, **kwargs
+            )
+
+        return idempotent_response(request, run)
+
 
 class TheatreHallViewSet(
+    ConditionalGetMixin,
+    CachedResponseMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.ListModelMixin,
@@ -170,3 +470,39 @@ class TheatreHallViewSet(
     queryset = TheatreHall.objects.all()
     serializer_class = TheatreHallSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    conditional_collections = ("catalog",)
+
+
+class SeatHoldViewSet(
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.ListModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet,
+):
+    queryset = SeatHold.objects.prefetch_related("seats")
+    serializer_class = SeatHoldSerializer
+    permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+
+    def get_queryset(self):
+        return self.queryset.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    def perform_destroy(self, instance):
+        release_holds(SeatHold.objects.filter(id=instance.id))
+
+    @action(methods=["POST"], detail=True)
+    def extend(self, request, pk=None):
+        hold = extend_hold(self.get_object())
+        return Response(self.get_serializer(hold).data)
+
+    @extend_schema(responses=ReservationSerializer)
+    @action(methods=["POST"], detail=True)
+    def confirm(self, request, pk=None):
+        reservation = confirm_hold(self.get_object())
+        return Response(
+            ReservationSerializer(reservation).data,
+            status=status.HTTP_201_CREATED,
+        )
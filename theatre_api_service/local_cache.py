@@ -0,0 +1,56 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+
+
+class LocalCache:
+    """Per-process LRU whose entries are kept for a few seconds.
+
+    Size and lifetime are read from the named settings. Entries are only
+    dropped in the process that changed the data, other processes see
+    the change once their entry expires.
+    """
+
+    def __init__(self, size_setting, timeout_setting):
+        self.size_setting = size_setting
+        self.timeout_setting = timeout_setting
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        timeout = getattr(settings, self.timeout_setting)
+        size = getattr(settings, self.size_setting)
+        expires = time.monotonic() + timeout
+        with self.lock:
+            self.entries[key] = (expires, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+def is_process_local(cache):
+    """Whether ``cache`` is private to the process, like LocMemCache"""
+    return isinstance(cache, LocMemCache)
@@ -0,0 +1,101 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+IN_LIST = re.compile(r"IN \((?:%s, )*%s\)")
+WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql):
+    """SQL with parameter lists collapsed, equal for repeated queries"""
+    return IN_LIST.sub("IN (...)", WHITESPACE.sub(" ", sql)).strip()
+
+
+class QueryRecorder:
+    """``execute_wrapper`` counting and timing the queries it sees"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self):
+        return {
+            sql: count
+            for sql, count in self.fingerprints.most_common()
+            if count > 1
+        }
+
+
+class QueryInstrumentationMiddleware:
+    """Report the database work of each request.
+
+    Enabled by the ``QUERY_INSTRUMENTATION`` setting. Responses get
+    ``X-DB-Queries`` and ``Server-Timing`` headers, and one log line per
+    request lists the query count, database time and the statements
+    that ran more than once, which is how N+1 queries show up.
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERY_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        db_ms = recorder.duration * 1000
+        total_ms = total * 1000
+        response["X-DB-Queries"] = str(recorder.count)
+        response["Server-Timing"] = (
+            f'db;dur={db_ms:.1f};desc="{recorder.count} queries", '
+            f"total;dur={total_ms:.1f}"
+        )
+
+        duplicates = recorder.duplicates()
+        logger.info(
+            "method=%s path=%s status=%s queries=%d db_ms=%.1f "
+            "total_ms=%.1f duplicates=%d",
+            request.method,
+            request.path,
+            response.status_code,
+            recorder.count,
+            db_ms,
+            total_ms,
+            sum(duplicates.values()),
+            extra={
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                "queries": recorder.count,
+                "db_ms": round(db_ms, 1),
+                "total_ms": round(total_ms, 1),
+                "duplicate_queries": duplicates,
+            },
+        )
+        for sql, count in duplicates.items():
+            logger.info("duplicate query count=%d sql=%s", count, sql)
+        return response
@@ -0,0 +1,28 @@
+from django.conf import settings
+from rest_framework import parsers
+from rest_framework.exceptions import ParseError
+
+from theatre_api_service.renderers import FastJSONRenderer, orjson
+
+UTF8 = {"utf-8", "utf8"}
+
+
+class FastJSONParser(parsers.JSONParser):
+    """JSON parser backed by orjson, falling back to the stdlib.
+
+    orjson only reads UTF-8 and, like the strict ``JSONParser``, rejects
+    ``NaN`` and ``Infinity``.
+    """
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict or encoding.lower() not in UTF8:
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
@@ -0,0 +1,112 @@
+"""PostgreSQL backend drawing its connections from a per-process pool.
+
+Pooling is on when the database settings have a ``POOL`` dict with
+``MAX_SIZE``, ``TIMEOUT``, ``MAX_LIFETIME``, ``MAX_IDLE`` and ``CHECK``.
+Closing the Django connection, as at the end of every request with
+``CONN_MAX_AGE = 0``, returns it to the pool.
+"""
+import threading
+
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+from theatre_api_service.pooled_postgresql.creation import DatabaseCreation
+from theatre_api_service.pooled_postgresql.pool import ConnectionPool
+
+Database = base.Database
+
+# by (alias, database name, connection parameters)
+pools = {}
+pools_lock = threading.Lock()
+
+
+def check_connection(connection):
+    if connection.closed:
+        return False
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+    except Database.Error:
+        return False
+    return True
+
+
+def reset_connection(connection):
+    """Roll back what the last request left open, False when unusable"""
+    if connection.closed:
+        return False
+    status = connection.info.transaction_status
+    if status == extensions.TRANSACTION_STATUS_IDLE:
+        return True
+    if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+        return False
+    try:
+        connection.rollback()
+    except Database.Error:
+        return False
+    return True
+
+
+def get_pool(alias, conn_params, options):
+    key = (
+        alias,
+        conn_params.get("database"),
+        repr(sorted(conn_params.items())),
+    )
+    with pools_lock:
+        if key not in pools:
+            pools[key] = ConnectionPool(
+                max_size=options["MAX_SIZE"],
+                timeout=options["TIMEOUT"],
+                max_lifetime=options["MAX_LIFETIME"],
+                max_idle=options["MAX_IDLE"],
+                check=check_connection if options["CHECK"] else None,
+                reset=reset_connection,
+            )
+        return pools[key]
+
+
+def pool_stats():
+    """Statistics of the pools of this process, by database alias"""
+    with pools_lock:
+        return {alias: pool.stats() for (alias, _, _), pool in pools.items()}
+
+
+def close_pools(database=None):
+    """Close the pools of a database name, or all of them"""
+    with pools_lock:
+        keys = [key for key in pools if database in (None, key[1])]
+        closing = [pools.pop(key) for key in keys]
+    for pool in closing:
+        pool.close()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connection_pool = None
+
+    def get_new_connection(self, conn_params):
+        options = self.settings_dict.get("POOL")
+        if not options or self.alias == NO_DB_ALIAS:
+            return super().get_new_connection(conn_params)
+
+        self.connection_pool = get_pool(self.alias, conn_params, options)
+        return self.connection_pool.getconn(
+            lambda: super(DatabaseWrapper, self).get_new_connection(
+                conn_params
+            )
+        )
+
+    def _close(self):
+        if self.connection_pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            # inside atomic() the connection stays with this wrapper until
+            # the block exits, so it is not handed to anyone else
+            self.connection_pool.putconn(
+                self.connection, discard=self.in_atomic_block
+            )
@@ -0,0 +1,200 @@
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """Thread-safe pool of at most ``max_size`` DB-API connections.
+
+    Idle connections are handed out most recently used first and are
+    checked with ``check`` on checkout. A connection is closed instead
+    of reused once it is older than ``max_lifetime`` or was idle longer
+    than ``max_idle`` seconds, or when ``reset`` fails on its return.
+    Checkouts wait up to ``timeout`` seconds for a free connection.
+    """
+
+    def __init__(
+        self,
+        connect=None,
+        max_size=10,
+        timeout=10.0,
+        max_lifetime=1800.0,
+        max_idle=300.0,
+        check=None,
+        reset=None,
+        clock=time.monotonic,
+    ):
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.check = check
+        self.reset = reset
+        self.clock = clock
+
+        self.condition = threading.Condition()
+        # (connection, created, returned) of the idle connections
+        self.idle = deque()
+        # creation time of the checked out connections, by id()
+        self.in_use = {}
+        self.size = 0
+        self.waiting = 0
+        self.closed = False
+        self.counters = dict.fromkeys(
+            (
+                "checkouts",
+                "connections_created",
+                "connections_recycled",
+                "checks_failed",
+                "resets_failed",
+                "timeouts",
+            ),
+            0,
+        )
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def expired(self, created, returned, now):
+        return (
+            now - created >= self.max_lifetime
+            or now - returned >= self.max_idle
+        )
+
+    def getconn(self, connect=None):
+        """Check out a connection, opening one when none is idle.
+
+        ``connect`` replaces the pool's own for this checkout.
+        """
+        start = self.clock()
+        while True:
+            conn, created = self.take(start + self.timeout)
+            if conn is None:
+                try:
+                    conn = (connect or self.connect)()
+                except BaseException:
+                    self.release_slot()
+                    raise
+                created = self.clock()
+                self.count("connections_created")
+            elif self.check is not None and not self.check(conn):
+                self.count("checks_failed")
+                self.discard(conn)
+                continue
+            break
+
+        waited = self.clock() - start
+        with self.condition:
+            self.in_use[id(conn)] = created
+            self.counters["checkouts"] += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+        return conn
+
+    def take(self, deadline):
+        """An idle connection, or (None, None) with a slot reserved for a
+        new one"""
+        expired = []
+        try:
+            with self.condition:
+                if self.closed:
+                    raise PoolTimeout("The connection pool is closed")
+                while True:
+                    now = self.clock()
+                    while self.idle:
+                        conn, created, returned = self.idle.pop()
+                        if not self.expired(created, returned, now):
+                            return conn, created
+                        expired.append(conn)
+                        self.size -= 1
+                        self.counters["connections_recycled"] += 1
+                    if self.size < self.max_size:
+                        self.size += 1
+                        return None, None
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self.counters["timeouts"] += 1
+                        raise PoolTimeout(
+                            f"No connection free within {self.timeout} s, "
+                            f"all {self.max_size} are in use"
+                        )
+                    self.waiting += 1
+                    try:
+                        self.condition.wait(remaining)
+                    finally:
+                        self.waiting -= 1
+        finally:
+            for conn in expired:
+                close_quietly(conn)
+
+    def putconn(self, conn, discard=False):
+        """Return a checked out connection"""
+        with self.condition:
+            created = self.in_use.pop(id(conn))
+        now = self.clock()
+        if not discard and self.reset is not None and not self.reset(conn):
+            self.count("resets_failed")
+            discard = True
+        if not discard and (self.closed or self.expired(created, now, now)):
+            self.count("connections_recycled")
+            discard = True
+        if discard:
+            self.discard(conn)
+            return
+        with self.condition:
+            self.idle.append((conn, created, now))
+            self.condition.notify()
+
+    def discard(self, conn):
+        close_quietly(conn)
+        self.release_slot()
+
+    def release_slot(self):
+        with self.condition:
+            self.size -= 1
+            self.condition.notify()
+
+    def count(self, counter):
+        with self.condition:
+            self.counters[counter] += 1
+
+    def close(self):
+        """Close the idle connections, checked out ones when returned"""
+        with self.condition:
+            self.closed = True
+            idle = [conn for conn, _, _ in self.idle]
+            self.size -= len(idle)
+            self.idle.clear()
+            self.condition.notify_all()
+        for conn in idle:
+            close_quietly(conn)
+
+    def stats(self):
+        with self.condition:
+            checkouts = self.counters["checkouts"]
+            return {
+                "size": self.size,
+                "max_size": self.max_size,
+                "in_use": len(self.in_use),
+                "idle": len(self.idle),
+                "waiting": self.waiting,
+                **self.counters,
+                "checkout_wait_ms": {
+                    "mean": round(
+                        self.wait_total / checkouts * 1000 if checkouts else 0,
+                        3,
+                    ),
+                    "max": round(self.wait_max * 1000, 3),
+                },
+            }
+
+
+def close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
@@ -0,0 +1,50 @@
+from rest_framework import renderers
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """JSON renderer backed by orjson, falling back to the stdlib.
+
+    Types orjson would format differently (datetimes, Decimals, lazy
+    strings, ...) are passed to DRF's encoder, so the bytes are the same
+    as ``JSONRenderer``'s. Indented output and non-default JSON settings
+    go through ``JSONRenderer`` itself. Floats in exponent notation are
+    written without the ``+`` and leading zeros (``1e16``).
+    """
+
+    options = (
+        orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+        | orjson.OPT_NON_STR_KEYS
+        if orjson
+        else 0
+    )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer_context = renderer_context or {}
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context)
+            is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder_class().default, option=self.options
+            )
+        except orjson.JSONEncodeError:
+            # e.g. integers over 64 bits
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # escaped like JSONRenderer to keep the output a javascript subset
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
@@ -42,6 +42,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "rest_framework_simplejwt",
     "drf_spectacular",
@@ -51,6 +52,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "theatre_api_service.middleware.QueryInstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -63,6 +65,23 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = "theatre_api_service.urls"
 
+# Per-request query count and database time headers and log lines
+QUERY_INSTRUMENTATION = (
+    os.environ.get("QUERY_INSTRUMENTATION", "false").lower() == "true"
+)
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "theatre_api_service.middleware": {
+            "handlers": ["console"],
+            "level": "INFO",
+        },
+    },
+}
+
 
 INTERNAL_IPS = ["127.0.0.1"]
 
@@ -92,15 +111,65 @@ WSGI_APPLICATION = "theatre_api_service.wsgi.application"
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": "theatre_api_service.pooled_postgresql",
         "NAME": os.environ["POSTGRES_NAME"],
         "HOST": os.environ["POSTGRES_HOST"],
         "USER": os.environ["POSTGRES_USER"],
-        "PASSWORD": os.environ["POSTGRES_PASSWORD"]
+        "PASSWORD": os.environ["POSTGRES_PASSWORD"],
+        # connections of a worker process, returned at the end of requests
+        "POOL": {
+            "MAX_SIZE": int(os.environ.get("DB_POOL_MAX_SIZE", 10)),
+            "TIMEOUT": float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+            "MAX_LIFETIME": float(
+                os.environ.get("DB_POOL_MAX_LIFETIME", 1800)
+            ),
+            "MAX_IDLE": float(os.environ.get("DB_POOL_MAX_IDLE", 300)),
+            "CHECK": os.environ.get("DB_POOL_CHECK", "true").lower()
+            == "true",
+        }
+        if os.environ.get("DB_POOL", "true").lower() == "true"
+        else None,
     }
 }
 
 
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
+    },
+}
+
+SEAT_MAP_CACHE_TIMEOUT = int(os.environ.get("SEAT_MAP_CACHE_TIMEOUT", 60))
+
+CATALOG_CACHE_TIMEOUT = int(os.environ.get("CATALOG_CACHE_TIMEOUT", 300))
+
+# rows and seats of the hall of every performance, used to validate seats
+HALL_GEOMETRY_CACHE_TIMEOUT = int(
+    os.environ.get("HALL_GEOMETRY_CACHE_TIMEOUT", 3600)
+)
+HALL_GEOMETRY_LOCAL_CACHE_TIMEOUT = int(
+    os.environ.get("HALL_GEOMETRY_LOCAL_CACHE_TIMEOUT", 60)
+)
+HALL_GEOMETRY_LOCAL_CACHE_SIZE = int(
+    os.environ.get("HALL_GEOMETRY_LOCAL_CACHE_SIZE", 4096)
+)
+
+# users of authenticated requests, shared and per process (seconds)
+USER_CACHE_TIMEOUT = int(os.environ.get("USER_CACHE_TIMEOUT", 300))
+USER_LOCAL_CACHE_TIMEOUT = int(os.environ.get("USER_LOCAL_CACHE_TIMEOUT", 5))
+USER_LOCAL_CACHE_SIZE = int(os.environ.get("USER_LOCAL_CACHE_SIZE", 1024))
+
+SEAT_HOLD_MINUTES = int(os.environ.get("SEAT_HOLD_MINUTES", 10))
+SEAT_HOLD_MAX_MINUTES = int(os.environ.get("SEAT_HOLD_MAX_MINUTES", 30))
+
+IDEMPOTENCY_KEY_TTL_HOURS = int(
+    os.environ.get("IDEMPOTENCY_KEY_TTL_HOURS", 24)
+)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -150,15 +219,36 @@ STATIC_URL = "static/"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 
+MAX_PAGE_SIZE = int(os.environ.get("MAX_PAGE_SIZE", 100))
+
+FAST_LIST_SERIALIZATION = (
+    os.environ.get("FAST_LIST_SERIALIZATION", "false").lower() == "true"
+)
+
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_PAGINATION_CLASS": "theatre.pagination.TheatreCursorPagination",
+    "PAGE_SIZE": 10,
+    "DEFAULT_RENDERER_CLASSES": [
+        "theatre_api_service.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "theatre_api_service.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "theatre_api_service.throttling.AnonRateThrottle",
+        "theatre_api_service.throttling.UserRateThrottle",
     ],
-    "DEFAULT_THROTTLE_RATES": {"anon": "100/day", "user": "1000/minute"},
+    # an empty rate switches the throttle off, as for load tests
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": os.environ.get("THROTTLE_RATE_ANON", "100/day") or None,
+        "user": os.environ.get("THROTTLE_RATE_USER", "1000/minute") or None,
+    },
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user.authentication.CachedJWTAuthentication",
     ),
 }
 
@@ -181,4 +271,4 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=5),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "ROTATE_REFRESH_TOKENS": True,
-}
\ No newline at end of file
+}
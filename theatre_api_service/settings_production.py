@@ -0,0 +1,62 @@
+"""Production settings, selected with
+DJANGO_SETTINGS_MODULE=theatre_api_service.settings_production
+
+Only the apps and middleware that serve the API are loaded: no debug
+toolbar, no browsable API, and DEBUG is off so no query log is kept.
+The default cache must be shared by the gunicorn workers, the seat map,
+catalog, user and hall geometry invalidations only reach the workers
+that see the same cache.
+"""
+import os
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+from theatre_api_service.settings import *  # noqa: F401, F403
+from theatre_api_service.settings import (
+    INSTALLED_APPS,
+    MIDDLEWARE,
+    REST_FRAMEWORK,
+)
+
+DEBUG = False
+
+ALLOWED_HOSTS = [
+    host for host in os.environ.get("ALLOWED_HOSTS", "").split(",") if host
+]
+
+DEBUG_ONLY_APPS = ("debug_toolbar",)
+DEBUG_ONLY_MIDDLEWARE = ("debug_toolbar.middleware.DebugToolbarMiddleware",)
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in DEBUG_ONLY_APPS]
+
+MIDDLEWARE = [
+    middleware
+    for middleware in MIDDLEWARE
+    if middleware not in DEBUG_ONLY_MIDDLEWARE
+]
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    "DEFAULT_RENDERER_CLASSES": [
+        "theatre_api_service.renderers.FastJSONRenderer",
+    ],
+}
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.redis.RedisCache"
+        ),
+        "LOCATION": os.environ.get(
+            "CACHE_LOCATION", "redis://localhost:6379/0"
+        ),
+    },
+}
+
+if issubclass(import_string(CACHES["default"]["BACKEND"]), LocMemCache):
+    raise ImproperlyConfigured(
+        "CACHE_BACKEND is private to each worker process, set a shared one "
+        "such as django.core.cache.backends.redis.RedisCache"
+    )
@@ -0,0 +1,110 @@
+from functools import lru_cache
+
+from django.db import connection
+from rest_framework import throttling
+
+from theatre.models import ThrottleCounter
+
+
+@lru_cache(maxsize=None)
+def counter_sql():
+    table = ThrottleCounter._meta.db_table
+    key, period, count, expires = (
+        connection.ops.quote_name(ThrottleCounter._meta.get_field(name).column)
+        for name in ("key", "period", "count", "expires")
+    )
+    table = connection.ops.quote_name(table)
+    # count the request and read the previous window in one statement
+    increment = (
+        f"INSERT INTO {table} ({key}, {period}, {count}, {expires}) "
+        f"VALUES (%s, %s, 1, %s) "
+        f"ON CONFLICT ({key}, {period}) "
+        f"DO UPDATE SET {count} = {table}.{count} + 1 "
+        f"RETURNING {count}, (SELECT previous.{count} FROM {table} previous "
+        f"WHERE previous.{key} = %s AND previous.{period} = %s)"
+    )
+    decrement = (
+        f"UPDATE {table} SET {count} = {count} - 1 "
+        f"WHERE {key} = %s AND {period} = %s"
+    )
+    return increment, decrement
+
+
+class SlidingWindowThrottleMixin:
+    """Sliding window counter in place of DRF's request history.
+
+    Each key keeps two counters, of the current and of the previous
+    window, as ThrottleCounter rows shared by the worker processes. The
+    previous window counts in proportion to how much of it still
+    overlaps the last ``duration`` seconds. A request increments its
+    counter and reads the previous one with a single upsert, so
+    concurrent requests can't exceed the rate; throttled requests take
+    their increment back. Counters expire once they are no longer the
+    previous window, ``clear_throttle_counters`` deletes them.
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window, self.elapsed = divmod(self.now, self.duration)
+        self.period = int(window)
+        increment, _ = counter_sql()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                increment,
+                [
+                    self.key,
+                    self.period,
+                    # the counter outlives its window, as the previous one
+                    int((window + 2) * self.duration),
+                    self.key,
+                    self.period - 1,
+                ],
+            )
+            counted, previous = cursor.fetchone()
+        self.current = counted - 1
+        self.previous = previous or 0
+
+        overlap = 1 - self.elapsed / self.duration
+        if self.previous * overlap + self.current >= self.num_requests:
+            return self.throttle_failure()
+        return self.throttle_success()
+
+    def throttle_success(self):
+        return True
+
+    def throttle_failure(self):
+        _, decrement = counter_sql()
+        with connection.cursor() as cursor:
+            cursor.execute(decrement, [self.key, self.period])
+        return False
+
+    def wait(self):
+        if not self.num_requests:
+            # a zero rate never lets requests through
+            return None
+        if self.current < self.num_requests:
+            # until the previous window has slid out far enough
+            allowed = (self.num_requests - self.current) / self.previous
+            return max(self.duration * (1 - allowed) - self.elapsed, 0)
+        # until the next window, in which this one is the previous
+        allowed = self.num_requests / self.current
+        return self.duration - self.elapsed + self.duration * (1 - allowed)
+
+
+class AnonRateThrottle(
+    SlidingWindowThrottleMixin, throttling.AnonRateThrottle
+):
+    pass
+
+
+class UserRateThrottle(
+    SlidingWindowThrottleMixin, throttling.UserRateThrottle
+):
+    pass
@@ -14,6 +14,7 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 from drf_spectacular.views import (
@@ -22,6 +23,18 @@ from drf_spectacular.views import (
     SpectacularRedocView
 )
 
+from theatre_api_service.views import DatabasePoolView, ResponseCacheView
+
+# operational routes, budgeted in theatre/tests/query_budget.py
+ops_urlpatterns = [
+    path("api/db-pool/", DatabasePoolView.as_view(), name="db-pool"),
+    path(
+        "api/response-cache/",
+        ResponseCacheView.as_view(),
+        name="response-cache",
+    ),
+]
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/theatre/", include("theatre.urls", namespace="theatre")),
@@ -38,6 +51,7 @@ urlpatterns = [
         SpectacularRedocView.as_view(url_name="schema"),
         name="redoc",
     ),
+] + ops_urlpatterns
 
-    path("__debug__/", include("debug_toolbar.urls")),
-]
+if "debug_toolbar" in settings.INSTALLED_APPS:
+    urlpatterns.append(path("__debug__/", include("debug_toolbar.urls")))
@@ -0,0 +1,30 @@
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from theatre.response_cache import response_cache_stats
+from theatre_api_service.pooled_postgresql.base import pool_stats
+
+
+class DatabasePoolView(APIView):
+    """Connection pool statistics of the worker process serving the
+    request, by database alias"""
+
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(responses=OpenApiTypes.OBJECT)
+    def get(self, request):
+        return Response(pool_stats())
+
+
+class ResponseCacheView(APIView):
+    """Hits and misses of the catalog response cache, of all the workers
+    sharing the cache"""
+
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(responses=OpenApiTypes.OBJECT)
+    def get(self, request):
+        return Response(response_cache_stats())
@@ -0,0 +1,75 @@
+import copy
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from theatre_api_service.local_cache import LocalCache, is_process_local
+
+
+def user_cache_key(user_id):
+    return f"user:auth:{user_id}"
+
+
+local_users = LocalCache("USER_LOCAL_CACHE_SIZE", "USER_LOCAL_CACHE_TIMEOUT")
+
+
+def shared_users():
+    """The default cache, None when the other processes don't see it.
+
+    A process-local cache would keep users for USER_CACHE_TIMEOUT in
+    the processes the invalidation of a change doesn't reach.
+    """
+    cache = caches["default"]
+    return None if is_process_local(cache) else cache
+
+
+def forget_user(user_id):
+    local_users.delete(str(user_id))
+    cache = shared_users()
+    if cache is not None:
+        cache.delete(user_cache_key(user_id))
+
+
+def invalidate_user(user_id):
+    forget_user(user_id)
+    # again after commit, a request may have cached the old row meanwhile
+    transaction.on_commit(lambda: forget_user(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication without a user query on every request.
+
+    Users are looked up in a small per-process LRU, then in the shared
+    cache when there is one, and loaded from the database on a miss.
+    ``user.signals`` drops them whenever a user is saved or deleted.
+    Views must not save the returned user, it may be outdated.
+    """
+
+    def get_user(self, validated_token):
+        user_id = str(validated_token.get(api_settings.USER_ID_CLAIM, ""))
+        user = local_users.get(user_id)
+        if user is None:
+            cache = shared_users()
+            if cache is not None:
+                user = cache.get(user_cache_key(user_id))
+            if user is None:
+                user = super().get_user(validated_token)
+                if cache is not None:
+                    cache.set(
+                        user_cache_key(user_id),
+                        user,
+                        settings.USER_CACHE_TIMEOUT,
+                    )
+            local_users.set(user_id, user)
+
+        if not user.is_active:
+            raise AuthenticationFailed(
+                _("User is inactive"), code="user_inactive"
+            )
+        # views may change request.user, the cached one is shared
+        return copy.copy(user)
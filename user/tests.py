@@ -1,3 +1,112 @@
-from django.test import TestCase
+import tempfile
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from theatre.tests.query_budget import assert_route_queries
+from user.authentication import local_users
+
+MANAGE_URL = reverse("user:manage")
+GENRE_URL = reverse("theatre:genre-list")
+
+SHARED_CACHES = {
+    **settings.CACHES,
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": tempfile.mkdtemp(),
+    },
+}
+
+
+class CachedJWTAuthenticationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_users.clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@user.com", password="testpass"
+        )
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+
+    def test_user_loaded_once(self):
+        self.client.get(MANAGE_URL)
+
+        with assert_route_queries(self, 0):
+            res = self.client.get(MANAGE_URL)
+        self.assertEqual(res.data["email"], "test@user.com")
+
+    @override_settings(USER_LOCAL_CACHE_SIZE=0, CACHES=SHARED_CACHES)
+    def test_user_shared_between_processes(self):
+        cache.clear()
+        self.client.get(MANAGE_URL)
+
+        with assert_route_queries(self, 0):
+            self.client.get(MANAGE_URL)
+
+    @override_settings(USER_LOCAL_CACHE_SIZE=0)
+    def test_process_local_cache_not_shared(self):
+        self.client.get(MANAGE_URL)
+
+        # other processes would keep the user after a change
+        with assert_route_queries(self, 1):
+            self.client.get(MANAGE_URL)
+
+    def test_permissions_follow_user_changes(self):
+        self.assertEqual(
+            self.client.post(GENRE_URL, {"name": "Drama"}).status_code,
+            status.HTTP_403_FORBIDDEN,
+        )
+
+        self.user.is_staff = True
+        self.user.save()
+
+        res = self.client.post(GENRE_URL, {"name": "Drama"})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_updated_by_manage_view(self):
+        self.client.get(MANAGE_URL)
+
+        self.client.patch(MANAGE_URL, {"email": "new@user.com"})
+
+        res = self.client.get(MANAGE_URL)
+        self.assertEqual(res.data["email"], "new@user.com")
+
+    def test_update_does_not_restore_cached_fields(self):
+        self.user.is_staff = True
+        self.user.save()
+        self.client.get(MANAGE_URL)
+        # demoted by another process, the cached user is still staff
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            is_staff=False
+        )
+
+        self.client.patch(MANAGE_URL, {"email": "new@user.com"})
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email, "new@user.com")
+        self.assertFalse(self.user.is_staff)
+
+    def test_deleted_user_rejected(self):
+        self.client.get(MANAGE_URL)
+
+        self.user.delete()
+
+        res = self.client.get(MANAGE_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_inactive_user_rejected(self):
+        self.client.get(MANAGE_URL)
+
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(MANAGE_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -1,7 +1,8 @@
+from django.contrib.auth import get_user_model
 from django.shortcuts import render
 from rest_framework import generics
 from rest_framework.authentication import TokenAuthentication
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
 from rest_framework.settings import api_settings
 
 from user.serializers import UserSerializer
@@ -17,4 +18,7 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
     permission_classes = (IsAuthenticated, )
 
     def get_object(self):
-        return self.request.user
+        if self.request.method in SAFE_METHODS:
+            return self.request.user
+        # request.user may be cached, saving it would restore old fields
+        return get_user_model().objects.get(pk=self.request.user.pk)